@@ -0,0 +1,50 @@
+"""
+Hair Try-On Real-Time API Routes
+WebSocket sessions for live frame processing, plus service statistics
+"""
+
+from fastapi import APIRouter, HTTPException, WebSocket
+import logging
+
+from app.services.ai_service import ai_service
+from app.services.database_service import database_service
+from app.services.websocket_service import websocket_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/hair", tags=["Hair Try-On Real-Time"])
+
+
+@router.websocket("/realtime/{session_id}")
+async def realtime_hair_tryOn(websocket: WebSocket, session_id: str, user_id: str):
+    """
+    Real-time hair try-on over a WebSocket
+
+    Clients send set_style_image / set_color_image once, then process_frame
+    messages; processed frames are sent back on the same socket.
+
+    Args:
+        session_id: Client-chosen session ID
+        user_id: User ID (query parameter)
+    """
+    await websocket_service.handle_connection(websocket, session_id, user_id)
+
+
+@router.get("/stats")
+async def get_stats():
+    """
+    Get processing statistics
+
+    Returns:
+        Database, WebSocket and AI processing statistics
+    """
+    try:
+        return {
+            "database_stats": await database_service.get_processing_statistics(),
+            "websocket_stats": websocket_service.connection_manager.get_connection_stats(),
+            "ai_stats": ai_service.get_processing_stats()
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to get statistics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve statistics")
@@ -6,6 +6,7 @@ Updated to use local HairFastGAN and PerfectCorp API
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
 from fastapi.responses import Response, JSONResponse
 from typing import Optional
+from collections import Counter
 import logging
 from datetime import datetime
 import uuid
@@ -15,6 +16,7 @@ import asyncio
 from app.core.config import settings
 
 from app.services.perfectcorp_service import PerfectCorpService
+from app.services.temp_storage_service import upload_to_temp_storage
 # from app.services.magicapi_service import MagicAPIService
 from app.services.database_service import database_service
 
@@ -79,10 +81,13 @@ async def get_default_hairstyles(
             all_hairstyles = result.get("data", [])
             logger.info(f"Total hairstyles fetched: {len(all_hairstyles)}")
             
-            # Log gender breakdown
-            male_count = sum(1 for h in all_hairstyles if h.get('gender', '').lower() == 'male')
-            female_count = sum(1 for h in all_hairstyles if h.get('gender', '').lower() == 'female')
-            logger.info(f"📊 Gender breakdown - Male: {male_count}, Female: {female_count}")
+            # Log gender breakdown of the returned hairstyles; when they are the
+            # whole catalog, reuse the counts computed at load time
+            if len(all_hairstyles) == len(perfectcorp_service.hairstyles):
+                gender_counts = perfectcorp_service.gender_counts
+            else:
+                gender_counts = Counter(h.get('gender', '').lower() for h in all_hairstyles)
+            logger.info(f"📊 Gender breakdown - Male: {gender_counts.get('male', 0)}, Female: {gender_counts.get('female', 0)}")
             
             return {
                 "success": True,
@@ -98,17 +103,16 @@ async def get_default_hairstyles(
                 force_refresh=force_refresh
             )
             
-            print(f"🔵 Route received result keys: {list(result.keys())}")  # Debug print
-            print(f"🔵 Result data length: {len(result.get('data', []))}")  # Debug print
-            
             # The service returns 'data' key, not 'hairstyles'
             hairstyles_data = result.get("data", [])
             
-            # Debug: Log first few hairstyles with gender info
-            if hairstyles_data:
-                print(f"🔍 First 3 hairstyles gender info:")
+            # Debug: Log result shape and first few hairstyles with gender info.
+            # Guarded so the f-strings aren't built when debug logging is off.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔵 Route received result keys: {list(result.keys())}")
+                logger.debug(f"🔵 Result data length: {len(hairstyles_data)}")
                 for i, style in enumerate(hairstyles_data[:3]):
-                    print(f"  [{i}] ID: {style.get('id')}, Gender: {style.get('gender')}, Category: {style.get('category')}")
+                    logger.debug(f"🔍 [{i}] ID: {style.get('id')}, Gender: {style.get('gender')}, Category: {style.get('category')}")
             
             return {
                 "success": True,
@@ -280,29 +284,8 @@ async def process_hair_tryOn(
         # Or better, return Base64 data URL if the image is small enough?
         # Images might be large.
         
-        # Let's use a simple helper to upload to tmpfiles.org for now.
-        import aiohttp
-        async def upload_result_to_temp(img_bytes):
-            try:
-                url = "https://tmpfiles.org/api/v1/upload"
-                data = aiohttp.FormData()
-                data.add_field('file', img_bytes, filename='result.jpg', content_type='image/jpeg')
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, data=data) as response:
-                        if response.status == 200:
-                            res = await response.json()
-                            if res.get("status") == "success":
-                                page_url = res.get("data", {}).get("url")
-                                if page_url:
-                                    direct_url = page_url.replace("tmpfiles.org/", "tmpfiles.org/dl/")
-                                    if direct_url.startswith("http://"):
-                                        direct_url = direct_url.replace("http://", "https://")
-                                    return direct_url
-            except:
-                pass
-            return None
-
-        result_url = await upload_result_to_temp(result_image_bytes)
+        # Upload through the shared tmpfiles.org helper (also used by MagicAPIService)
+        result_url = await upload_to_temp_storage(result_image_bytes, filename='result.jpg')
         
         if not result_url:
              # Fallback: Return Base64 data URI if upload fails?
@@ -0,0 +1,211 @@
+"""
+Hair Try-On Video API Routes
+Video upload and background video processing
+"""
+
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile, Form, HTTPException
+from typing import Optional
+import logging
+import os
+import time
+import uuid
+import asyncio
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.models.hair_tryOn import (
+    HairTryOnResult,
+    ProcessingMetadata,
+    ProcessingStatus,
+    ProcessingType,
+    VideoUploadResponse
+)
+from app.services.database_service import database_service
+from app.services.video_service import video_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/hair", tags=["Hair Try-On Video"])
+
+
+def _find_upload(upload_id: str) -> Optional[str]:
+    """Return the path of a video saved by /upload-video, if it exists"""
+    for extension in settings.allowed_video_formats:
+        path = os.path.join(settings.upload_dir, f"{upload_id}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _decode_image(data: bytes) -> np.ndarray:
+    """Decode uploaded image bytes to a BGR array"""
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Invalid image data")
+    return image
+
+
+async def _run_video_processing(
+    result_id: str,
+    upload_id: str,
+    style_data: bytes,
+    color_data: Optional[bytes]
+):
+    """Process an uploaded video in the background and record the outcome"""
+    start_time = time.perf_counter()
+
+    try:
+        video_path = _find_upload(upload_id)
+        if video_path is None:
+            raise FileNotFoundError(f"Upload {upload_id} not found")
+
+        style_image = await asyncio.to_thread(_decode_image, style_data)
+        color_image = await asyncio.to_thread(_decode_image, color_data) if color_data else None
+
+        output_name = f"{result_id}_result.mp4"
+        output_path = os.path.join(settings.upload_dir, output_name)
+        await video_service.process_video(video_path, output_path, style_image, color_image)
+
+        info = await asyncio.to_thread(video_service.get_video_info, output_path)
+        metadata = ProcessingMetadata(
+            processing_time=time.perf_counter() - start_time,
+            frames_processed=info["frame_count"],
+            frame_sampling_rate=settings.frame_sampling_rate,
+            output_fps=info["fps"]
+        )
+        await database_service.update_hair_tryOn_result(result_id, {
+            "status": ProcessingStatus.COMPLETED.value,
+            "result_media_url": f"/uploads/{output_name}",
+            "processing_metadata": metadata.dict()
+        })
+        logger.info(f"Video processing completed for result {result_id}")
+
+    except Exception as e:
+        logger.error(f"Video processing failed for result {result_id}: {e}")
+        try:
+            await database_service.update_hair_tryOn_result(result_id, {
+                "status": ProcessingStatus.FAILED.value,
+                "error_message": str(e)
+            })
+        except Exception as db_e:
+            logger.error(f"Failed to record video processing failure for {result_id}: {db_e}")
+
+
+@router.post("/upload-video", response_model=VideoUploadResponse)
+async def upload_video(
+    video: UploadFile = File(...),
+    user_id: str = Form(...)
+):
+    """
+    Upload a video for later processing
+
+    Args:
+        video: Video file
+        user_id: User ID
+
+    Returns:
+        Upload ID and video information
+    """
+    try:
+        validation = await video_service.validate_video(video)
+
+        upload_id = str(uuid.uuid4())
+        file_path = await video_service.save_uploaded_video(video, upload_id)
+        info = await asyncio.to_thread(video_service.get_video_info, file_path)
+
+        logger.info(f"Video uploaded by {user_id}: {upload_id}")
+
+        return VideoUploadResponse(
+            upload_id=upload_id,
+            file_url=f"/uploads/{os.path.basename(file_path)}",
+            file_size=validation["size"],
+            duration=info["duration"],
+            fps=info["fps"],
+            resolution=info["resolution"]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Video upload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Video upload failed: {e}")
+
+
+@router.post("/process-video", response_model=HairTryOnResult)
+async def process_video(
+    background_tasks: BackgroundTasks,
+    upload_id: str = Form(...),
+    user_id: str = Form(...),
+    style_image: UploadFile = File(...),
+    color_image: Optional[UploadFile] = File(None)
+):
+    """
+    Start applying a hairstyle to an uploaded video
+
+    Processing runs in the background; poll /result/{result_id} for the outcome.
+
+    Args:
+        upload_id: ID returned by /upload-video
+        user_id: User ID
+        style_image: Hairstyle reference image
+        color_image: Optional hair color reference image
+
+    Returns:
+        The result record in processing state
+    """
+    try:
+        style_data = await style_image.read()
+        color_data = await color_image.read() if color_image else None
+
+        result = HairTryOnResult(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            type=ProcessingType.VIDEO,
+            status=ProcessingStatus.PROCESSING,
+            original_media_url=f"/uploads/{upload_id}",
+            style_image_url=style_image.filename or "style_image",
+            color_image_url=color_image.filename if color_image else None
+        )
+        result.id = await database_service.create_hair_tryOn_result(result)
+
+        background_tasks.add_task(
+            _run_video_processing, result.id, upload_id, style_data, color_data
+        )
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Failed to start video processing: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to start video processing: {e}")
+
+
+@router.get("/result/{result_id}", response_model=HairTryOnResult)
+async def get_result(result_id: str, user_id: str):
+    """
+    Get a hair try-on result
+
+    Args:
+        result_id: Result ID
+        user_id: User ID (for authorization)
+
+    Returns:
+        The result record
+    """
+    try:
+        result = await database_service.get_hair_tryOn_result(result_id)
+
+        if not result:
+            raise HTTPException(status_code=404, detail="Result not found")
+
+        if result.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get result {result_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve result")
@@ -42,12 +42,41 @@ class Settings(BaseSettings):
     magicapi_api_key: str = os.getenv("MAGICAPI_API_KEY", "")
     magicapi_api_url: str = os.getenv("MAGICAPI_API_URL", "https://prod.api.market/api/v1/magicapi/hair-v2")
     
+    # Replicate API Configuration
+    replicate_api_token: str = os.getenv("REPLICATE_API_TOKEN", "")
+    use_replicate_api: bool = os.getenv("USE_REPLICATE_API", "false").lower() == "true"
+    
     # Hugging Face API Configuration
     huggingface_api_key: str = os.getenv("HUGGINGFACE_API_KEY", "")
     use_huggingface_api: bool = os.getenv("USE_HUGGINGFACE_API", "true").lower() == "true"
     
+    # Video Processing Configuration
+    max_video_size: int = int(os.getenv("MAX_VIDEO_SIZE", "50000000"))  # 50MB
+    max_video_duration: int = int(os.getenv("MAX_VIDEO_DURATION", "10"))  # seconds
+    allowed_video_formats: list = ["mp4", "avi", "mov", "webm"]
+    frame_sampling_rate: float = float(os.getenv("FRAME_SAMPLING_RATE", "0.5"))
+    frame_queue_size: int = int(os.getenv("FRAME_QUEUE_SIZE", "8"))  # decoded frames buffered ahead
+    video_codec: str = os.getenv("VIDEO_CODEC", "mp4v")  # FourCC, e.g. "avc1" for H.264 where available
+    ffmpeg_encoder: str = os.getenv("FFMPEG_ENCODER", "")  # e.g. "libx264" or "h264_nvenc"; empty uses OpenCV's writer
+    ffmpeg_preset: str = os.getenv("FFMPEG_PRESET", "fast")
+    video_write_buffer_mb: int = int(os.getenv("VIDEO_WRITE_BUFFER_MB", "0"))  # extra writer buffer per video; 0 = FRAME_QUEUE_SIZE frames
+    max_concurrent_videos: int = int(os.getenv("MAX_CONCURRENT_VIDEOS", "2"))  # videos processed at once; each holds its own frame buffers
+    video_hw_decode: bool = os.getenv("VIDEO_HW_DECODE", "false").lower() == "true"  # NVDEC/VAAPI/QSV via OpenCV's FFmpeg backend
+    
+    # WebSocket / Real-time Configuration
+    websocket_max_connections: int = int(os.getenv("WEBSOCKET_MAX_CONNECTIONS", "100"))
+    websocket_timeout: int = int(os.getenv("WEBSOCKET_TIMEOUT", "300"))  # seconds of inactivity
+    target_latency_ms: int = int(os.getenv("TARGET_LATENCY_MS", "200"))
+    realtime_queue_size: int = int(os.getenv("REALTIME_QUEUE_SIZE", "1"))  # 1 = always process the latest frame
+    realtime_max_width: int = int(os.getenv("REALTIME_MAX_WIDTH", "512"))  # wider frames are downscaled; 0 disables
+    
     # Performance Configuration
     image_max_size: int = int(os.getenv("IMAGE_MAX_SIZE", "1024"))
+    face_detection_width: int = int(os.getenv("FACE_DETECTION_WIDTH", "320"))  # faces are detected at this width; 0 = full size
+    face_min_size_ratio: float = float(os.getenv("FACE_MIN_SIZE_RATIO", "0"))  # ignore faces narrower than this share of the detection width; 0 = cascade's 24 px
+    use_opencl: bool = os.getenv("USE_OPENCL", "false").lower() == "true"  # OpenCV T-API for face detection and optical flow
+    keyframe_interval: int = int(os.getenv("KEYFRAME_INTERVAL", "1"))  # Replicate API on every Nth stream frame, optical flow in between; 1 = every frame
+    face_motion_threshold: float = float(os.getenv("FACE_MOTION_THRESHOLD", "3.0"))  # mean abs change on a 64x64 thumbnail; 0 = detect every frame
     
     # Storage Configuration
     upload_dir: str = os.getenv("UPLOAD_DIR", "/tmp/uploads")
@@ -16,8 +16,11 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection
-from app.api.routes.hair_tryOn_v2 import router as hair_tryOn_router
+from app.api.routes.hair_tryOn_v2 import router as hair_tryOn_router, perfectcorp_service
+from app.api.routes.hair_video import router as hair_video_router
+from app.api.routes.hair_realtime import router as hair_realtime_router
 from app.services.database_service import database_service
+from app.services.websocket_service import websocket_service
 
 # Configure logging
 logging.basicConfig(
@@ -39,6 +42,9 @@ async def lifespan(app: FastAPI):
         os.makedirs(settings.temp_dir, exist_ok=True)
         os.makedirs(settings.model_path, exist_ok=True)
         
+        # Parse the static hairstyle catalog before serving requests
+        await perfectcorp_service.initialize()
+        
         # Initialize database connection
         try:
             await connect_to_mongo()
@@ -49,6 +55,9 @@ async def lifespan(app: FastAPI):
             logger.error(f"Failed to connect to database: {db_e}")
             logger.warning("Service starting without database connection")
         
+        # Idle WebSocket session cleanup
+        await websocket_service.start_service()
+        
         logger.info("Hair Try-On Service started successfully")
         
         yield
@@ -62,6 +71,7 @@ async def lifespan(app: FastAPI):
         logger.info("Shutting down Hair Try-On Service...")
         
         try:
+            await websocket_service.stop_service()
             await close_mongo_connection()
             logger.info("Hair Try-On Service shut down successfully")
         except Exception as e:
@@ -102,6 +112,8 @@ app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads"
 
 # Include routers
 app.include_router(hair_tryOn_router)
+app.include_router(hair_video_router)
+app.include_router(hair_realtime_router)
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -130,14 +142,21 @@ async def root():
             "Local HairFastGAN inference",
             "PerfectCorp default hairstyles",
             "Custom hairstyle upload",
-            "Single image processing"
+            "Single image processing",
+            "Video processing",
+            "Real-time WebSocket processing"
         ],
         "endpoints": {
             "get_hairstyles": "/api/hair/hairstyles",
             "get_hairstyle": "/api/hair/hairstyles/{hairstyle_id}",
             "process": "/api/hair/process",
+            "upload_video": "/api/hair/upload-video",
+            "process_video": "/api/hair/process-video",
+            "get_result": "/api/hair/result/{result_id}",
             "get_history": "/api/hair/history/{user_id}",
             "delete_result": "/api/hair/result/{result_id}",
+            "realtime": "/api/hair/realtime/{session_id}",
+            "stats": "/api/hair/stats",
             "health_check": "/api/hair/health",
             "docs": "/docs"
         }
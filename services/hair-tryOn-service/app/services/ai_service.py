@@ -1,22 +1,82 @@
-import torch
+import asyncio
 import numpy as np
 import cv2
-from typing import Optional, Tuple
-from PIL import Image
+from typing import AsyncIterator, Iterable, List, Optional, Tuple, Union
 import logging
 import os
+import threading
+import time
+import uuid
 import base64
-import io
+from collections import OrderedDict
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Returned by next() once a frame iterator is exhausted
+_NO_FRAME = object()
+
+# Entries kept by each per-image cache; one per style/color/frame size in use,
+# so concurrent sessions and videos don't evict each other every frame
+_IMAGE_CACHE_SIZE = 16
+
+
+class _ImageCache:
+    """Small thread-safe LRU of values derived from session images
+    
+    A session reuses the same style/color arrays for every frame, so entries
+    are keyed by the arrays' identity plus e.g. the frame shape. Each entry
+    holds its source arrays, so their ids can't be recycled while cached.
+    """
+    
+    def __init__(self, maxsize: int = _IMAGE_CACHE_SIZE):
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+    
+    def get(self, sources: tuple, extra, create):
+        """Cached value for (sources, extra), built with create() on a miss"""
+        key = (tuple(id(source) for source in sources), extra)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+        
+        value = create()
+        with self._lock:
+            self._entries[key] = (sources, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return value
+
 class ReplicateHairModel:
     """Hair try-on using Replicate API (free tier available)"""
     
     def __init__(self):
         self.api_token = settings.replicate_api_token
         self.model_loaded = False
+        # Encoded style images; the style stays fixed across a session's frames
+        self._style_cache = _ImageCache()
+        # Average hue per color image, reused across frames
+        self._hue_cache = _ImageCache()
+        # Style images resized to the frame size for the fallback blend
+        self._style_resized_cache = _ImageCache()
+        # Streams only call the API on every Nth frame and warp the last
+        # result onto the frames in between; 1 calls it for every frame
+        self.keyframe_interval = max(1, settings.keyframe_interval)
+        self.flow_width = 320
+        # stream_id -> (style, color, flow-size gray key frame, key result, frames since key)
+        self._keyframes: "OrderedDict[str, tuple]" = OrderedDict()
+        self._max_keyframes = 256
+        # (x grid, y grid) per frame size warped
+        self._grid_cache = _ImageCache()
+        # DIS flow instances aren't thread-safe; one per worker thread
+        self._flow_local = threading.local()
+        self.use_opencl = settings.use_opencl and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
         
     async def load_model(self):
         """Initialize Replicate API"""
@@ -39,30 +99,41 @@ class ReplicateHairModel:
     
     def _image_to_base64(self, image: np.ndarray) -> str:
         """Convert numpy image to base64 string"""
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(image_rgb)
-        
-        # Convert to base64
-        buffered = io.BytesIO()
-        pil_image.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        # Encode the BGR frame directly (no RGB conversion or PIL image); low
+        # PNG compression trades a slightly larger payload for a much faster encode
+        success, buffer = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not success:
+            raise ValueError("Failed to encode image")
+        # b64encode reads the encoded ndarray through the buffer protocol, no bytes copy
+        img_str = base64.b64encode(buffer).decode("ascii")
         
         return f"data:image/png;base64,{img_str}"
     
-    def _base64_to_image(self, base64_str: str) -> np.ndarray:
-        """Convert base64 string to numpy image"""
-        # Remove data URL prefix if present
-        if "base64," in base64_str:
-            base64_str = base64_str.split("base64,")[1]
-        
-        # Decode base64
-        img_data = base64.b64decode(base64_str)
-        pil_image = Image.open(io.BytesIO(img_data))
+    def _style_to_base64(self, style_image: np.ndarray) -> str:
+        """Encode the style image, reusing the previous encoding for the same image"""
+        return self._style_cache.get(
+            (style_image,), None, lambda: self._image_to_base64(style_image)
+        )
+    
+    def _base64_to_image(self, base64_str: Union[str, bytes, bytearray]) -> np.ndarray:
+        """Convert base64 string (or already-decoded image bytes) to numpy image"""
+        if isinstance(base64_str, (bytes, bytearray)):
+            # Raw encoded image, nothing to strip or base64-decode
+            img_data = base64_str
+        else:
+            # Remove data URL prefix if present; slicing past the comma avoids
+            # split() copying every base64 chunk of the payload
+            if base64_str.startswith("data:"):
+                comma = base64_str.find(",", 5)
+                if comma >= 0:
+                    base64_str = base64_str[comma + 1:]
+            
+            img_data = base64.b64decode(base64_str)
         
-        # Convert to numpy array and BGR
-        image_rgb = np.array(pil_image)
-        image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
+        # Decode straight to BGR (no PIL image or RGB->BGR pass)
+        image_bgr = cv2.imdecode(np.frombuffer(img_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image_bgr is None:
+            raise ValueError("Could not decode image data")
         
         return image_bgr
     
@@ -70,7 +141,8 @@ class ReplicateHairModel:
         self, 
         source_image: np.ndarray, 
         style_image: np.ndarray,
-        color_image: Optional[np.ndarray] = None
+        color_image: Optional[np.ndarray] = None,
+        stream_id: Optional[str] = None
     ) -> np.ndarray:
         """Apply hairstyle using Replicate API"""
         if not self.model_loaded:
@@ -80,12 +152,23 @@ class ReplicateHairModel:
             logger.warning("Replicate API not available, using fallback")
             return self._fallback_hair_transfer(source_image, style_image)
         
+        keyframe = self._keyframes.get(stream_id) if stream_id is not None else None
+        if (
+            keyframe is not None
+            and keyframe[0] is style_image
+            and keyframe[1] is color_image
+            and keyframe[3].shape == source_image.shape
+            and keyframe[4] + 1 < self.keyframe_interval
+        ):
+            self._keyframes[stream_id] = keyframe[:4] + (keyframe[4] + 1,)
+            return await asyncio.to_thread(self._warp_keyframe, keyframe[2], keyframe[3], source_image)
+        
         try:
             import replicate
             
             # Convert images to base64
             source_b64 = self._image_to_base64(source_image)
-            style_b64 = self._image_to_base64(style_image)
+            style_b64 = self._style_to_base64(style_image)
             
             # Use a hair transfer model from Replicate
             # Note: This is a placeholder model name - you may need to find the actual model
@@ -99,6 +182,9 @@ class ReplicateHairModel:
                 if color_image is not None:
                     result = self._apply_hair_color(result, color_image)
                 
+                if stream_id is not None and self.keyframe_interval > 1:
+                    self._store_keyframe(stream_id, style_image, color_image, source_image, result)
+                
                 return result
             else:
                 logger.warning("Replicate API returned no output, using fallback")
@@ -151,28 +237,118 @@ class ReplicateHairModel:
         """Fallback hair transfer using simple image processing"""
         logger.info("Using fallback hair transfer method")
         
-        # Resize style to match source
-        style_resized = cv2.resize(style_image, (source_image.shape[1], source_image.shape[0]))
+        # Resize style to match source (once per style image and frame size)
+        style_resized = self._get_style_resized(style_image, source_image.shape)
         
         # Simple blend operation
         blended = cv2.addWeighted(source_image, 0.7, style_resized, 0.3, 0)
         
         return blended
     
+    def _get_style_resized(self, style_image: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        """Style image resized to the frame size, reused while both stay the same"""
+        return self._style_resized_cache.get(
+            (style_image,), shape, lambda: cv2.resize(style_image, (shape[1], shape[0]))
+        )
+    
+    def release_stream(self, stream_id: str) -> None:
+        """Drop the stream's key frame"""
+        self._keyframes.pop(stream_id, None)
+    
+    def _flow_gray(self, image: np.ndarray) -> np.ndarray:
+        """Grayscale copy at flow_width, the resolution optical flow runs at"""
+        height, width = image.shape[:2]
+        if width > self.flow_width:
+            size = (self.flow_width, max(1, round(height * self.flow_width / width)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    
+    def _store_keyframe(
+        self,
+        stream_id: str,
+        style_image: np.ndarray,
+        color_image: Optional[np.ndarray],
+        source_image: np.ndarray,
+        result: np.ndarray
+    ) -> None:
+        """Remember an API result so the next frames of the stream can be warped from it"""
+        if result.shape != source_image.shape:
+            # The API may return a different resolution (e.g. upscaled)
+            result = cv2.resize(result, (source_image.shape[1], source_image.shape[0]), interpolation=cv2.INTER_AREA)
+        self._keyframes[stream_id] = (style_image, color_image, self._flow_gray(source_image), result, 0)
+        self._keyframes.move_to_end(stream_id)
+        while len(self._keyframes) > self._max_keyframes:
+            self._keyframes.popitem(last=False)
+    
+    def _get_flow_estimator(self) -> cv2.DISOpticalFlow:
+        """DIS optical flow for the calling thread, created on first use"""
+        flow_estimator = getattr(self._flow_local, "flow_estimator", None)
+        if flow_estimator is None:
+            flow_estimator = cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_FAST)
+            self._flow_local.flow_estimator = flow_estimator
+        return flow_estimator
+    
+    def _warp_keyframe(self, key_gray: np.ndarray, key_result: np.ndarray, source_image: np.ndarray) -> np.ndarray:
+        """Warp the key frame's result onto source_image using optical flow
+        
+        Dense flow is computed from the current frame back to the key frame
+        on the original (unstyled) inputs at flow_width, then upsampled, and
+        the styled key frame is resampled along it. Much cheaper than an API
+        round trip for the frames between key frames.
+        
+        Flow uses DIS (fast preset), which runs several times faster than
+        Farneback on the CPU at similar quality for this kind of motion. With
+        USE_OPENCL the single-channel flow inputs go through DIS's OpenCL
+        implementation; only the small flow field is copied back.
+        """
+        height, width = source_image.shape[:2]
+        gray = self._flow_gray(source_image)
+        flow_estimator = self._get_flow_estimator()
+        if self.use_opencl:
+            try:
+                flow = flow_estimator.calc(cv2.UMat(gray), cv2.UMat(key_gray), None).get()
+            except cv2.error as e:
+                logger.warning(f"OpenCL optical flow failed, falling back to CPU: {e}")
+                self.use_opencl = False
+                flow = flow_estimator.calc(gray, key_gray, None)
+        else:
+            flow = flow_estimator.calc(gray, key_gray, None)
+        
+        flow_height, flow_width = gray.shape
+        if (flow_width, flow_height) != (width, height):
+            flow = cv2.resize(flow, (width, height), interpolation=cv2.INTER_LINEAR)
+            flow[..., 0] *= width / flow_width
+            flow[..., 1] *= height / flow_height
+        
+        grid_x, grid_y = self._grid_cache.get((), (height, width), lambda: np.meshgrid(
+            np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32)
+        ))
+        
+        map_x = grid_x + flow[..., 0]
+        map_y = grid_y + flow[..., 1]
+        return cv2.remap(key_result, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    
     def _apply_hair_color(self, image: np.ndarray, color_image: np.ndarray) -> np.ndarray:
         """Apply hair color to the result image"""
         # Convert to HSV for color manipulation
         hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        color_hsv = cv2.cvtColor(color_image, cv2.COLOR_BGR2HSV)
         
         # Extract average hue from color image
-        avg_hue = np.mean(color_hsv[:, :, 0])
+        avg_hue = self._average_hue(color_image)
         
         # Apply color to hair regions (simplified)
         hsv[:, :, 0] = avg_hue
         
         result = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
         return result
+    
+    def _average_hue(self, color_image: np.ndarray) -> float:
+        """Average hue of the color image, converted to HSV only once per image"""
+        def average_hue() -> float:
+            color_hsv = cv2.cvtColor(color_image, cv2.COLOR_BGR2HSV)
+            return float(np.mean(color_hsv[:, :, 0]))
+        
+        return self._hue_cache.get((color_image,), None, average_hue)
 
 
 class LocalHairModel:
@@ -180,10 +356,36 @@ class LocalHairModel:
     
     def __init__(self):
         self.model = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._device = None
         self.model_loaded = False
         self.input_size = (512, 512)
+        self.face_detection_width = settings.face_detection_width
+        self.face_min_size_ratio = settings.face_min_size_ratio
+        self.use_opencl = settings.use_opencl and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        self._color_fill_cache = _ImageCache()
+        self._style_resized_cache = _ImageCache()
+        # Style+color overlays for the fused hair blend
+        self._hair_overlay_cache = _ImageCache()
+        # Loaded cascades, one per worker thread (CascadeClassifier isn't thread-safe)
+        self._cascade_local = threading.local()
+        # Per-stream (shape, thumbnail, faces) from the last detection, for motion gating
+        self.face_motion_threshold = settings.face_motion_threshold
+        self._face_tracks: "OrderedDict[str, Tuple[Tuple[int, ...], np.ndarray, np.ndarray]]" = OrderedDict()
+        self._max_face_tracks = 256
+        # Frames run on several worker threads; guards _face_tracks and the release count
+        self._face_tracks_lock = threading.Lock()
+        self._face_track_releases = 0
         
+    @property
+    def device(self):
+        """Torch device, resolved on first use so importing this module doesn't load torch"""
+        if self._device is None:
+            import torch
+            self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        return self._device
+    
     async def load_model(self):
         """Load local hair model if available"""
         try:
@@ -209,80 +411,269 @@ class LocalHairModel:
         self, 
         source_image: np.ndarray, 
         style_image: np.ndarray,
-        color_image: Optional[np.ndarray] = None
+        color_image: Optional[np.ndarray] = None,
+        stream_id: Optional[str] = None
     ) -> np.ndarray:
-        """Apply hairstyle using local model"""
+        """Apply hairstyle using local model
+        
+        stream_id identifies consecutive frames of one video or session so face
+        detection can be skipped while the scene is static.
+        """
         if not self.model_loaded:
             await self.load_model()
         
-        # Fallback to simple processing
-        return self._simple_hair_transfer(source_image, style_image, color_image)
+        # Fallback to simple processing. The OpenCV work releases the GIL, so
+        # running it on a worker thread keeps the event loop free and lets
+        # frames from concurrent sessions overlap.
+        return await asyncio.to_thread(
+            self._simple_hair_transfer, source_image, style_image, color_image, stream_id
+        )
+    
+    def release_stream(self, stream_id: str) -> None:
+        """Drop the face tracking state of a finished video or session"""
+        with self._face_tracks_lock:
+            self._face_tracks.pop(stream_id, None)
+            self._face_track_releases += 1
     
     def _simple_hair_transfer(
         self, 
         source_image: np.ndarray, 
         style_image: np.ndarray,
-        color_image: Optional[np.ndarray] = None
+        color_image: Optional[np.ndarray] = None,
+        stream_id: Optional[str] = None
     ) -> np.ndarray:
         """Simple hair transfer for CPU"""
-        # Resize style to match source
-        style_resized = cv2.resize(style_image, (source_image.shape[1], source_image.shape[0]))
+        # Resize style to match source; the style image and frame size are
+        # fixed for a video/session, so this only runs on the first frame
+        style_resized = self._get_style_resized(style_image, source_image.shape)
         
         # Detect faces and hair regions (simplified)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        gray = cv2.cvtColor(source_image, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-        
-        result = source_image.copy()
+        faces = self._detect_faces_tracked(source_image, stream_id)
         
         # If face detected, blend hair region
-        if len(faces) > 0:
-            for (x, y, w, h) in faces:
-                # Hair region is typically above the face
-                hair_y_start = max(0, y - int(h * 0.5))
-                hair_y_end = y + int(h * 0.2)
-                hair_x_start = max(0, x - int(w * 0.2))
-                hair_x_end = min(source_image.shape[1], x + w + int(w * 0.2))
-                
-                # Blend hair region
-                hair_region = result[hair_y_start:hair_y_end, hair_x_start:hair_x_end]
-                style_region = style_resized[hair_y_start:hair_y_end, hair_x_start:hair_x_end]
-                
-                if hair_region.shape == style_region.shape:
-                    blended = cv2.addWeighted(hair_region, 0.6, style_region, 0.4, 0)
-                    result[hair_y_start:hair_y_end, hair_x_start:hair_x_end] = blended
+        regions = self._hair_regions(faces, source_image.shape[1])
+        
+        if regions:
+            # Only the region blend edits a buffer in place, so only it needs a
+            # copy to keep the caller's frame untouched
+            result = source_image.copy()
+            
+            if color_image is not None and self._regions_overlap(regions):
+                # Where regions overlap both blends compound per region, which
+                # the fused blend can't reproduce, so run the two passes
+                for region in regions:
+                    hair_region = result[region]
+                    cv2.addWeighted(hair_region, 0.6, style_resized[region], 0.4, 0, dst=hair_region)
+                self._apply_hair_color(result, color_image, regions)
+                return result
+            
+            # With a color image the style blend (0.6/0.4) and the color tint
+            # (0.7/0.3) collapse into one blend against a precomputed float32
+            # overlay, so each region takes a single pass, rounded once
+            if color_image is not None:
+                overlay = self._get_hair_overlay(style_image, style_resized, color_image)
+                source_weight, overlay_weight = 0.42, 1.0
+            else:
+                overlay = style_resized
+                source_weight, overlay_weight = 0.6, 0.4
+            
+            for region in regions:
+                # Blend hair region, writing straight into the result view
+                # (one pass, no temporary to copy back)
+                hair_region = result[region]
+                cv2.addWeighted(
+                    hair_region, source_weight, overlay[region], overlay_weight, 0,
+                    dst=hair_region, dtype=cv2.CV_8U
+                )
         else:
-            # No face detected, blend entire image
+            # No face detected, blend entire image (the color tint only
+            # applies to hair regions)
             result = cv2.addWeighted(source_image, 0.7, style_resized, 0.3, 0)
         
-        # Apply color if provided
-        if color_image is not None:
-            result = self._apply_hair_color(result, color_image, faces)
-        
         return result
     
-    def _apply_hair_color(self, image: np.ndarray, color_image: np.ndarray, faces) -> np.ndarray:
-        """Apply hair color to detected hair regions"""
-        result = image.copy()
+    def _detect_faces_tracked(self, image: np.ndarray, stream_id: Optional[str]) -> np.ndarray:
+        """Detect faces, reusing the stream's last boxes while the frame barely changes
         
-        # Get average color from color image
-        avg_color = np.mean(color_image, axis=(0, 1))
+        A 64x64 grayscale thumbnail is compared against the one from the last
+        detection; below face_motion_threshold (mean absolute difference) the
+        cascade is skipped. Comparing against the last *detected* frame, not the
+        previous one, bounds how far slow motion can drift before re-detection.
         
-        if len(faces) > 0:
-            for (x, y, w, h) in faces:
-                # Hair region
-                hair_y_start = max(0, y - int(h * 0.5))
-                hair_y_end = y + int(h * 0.2)
-                hair_x_start = max(0, x - int(w * 0.2))
-                hair_x_end = min(image.shape[1], x + w + int(w * 0.2))
-                
-                # Apply color tint to hair region
-                hair_region = result[hair_y_start:hair_y_end, hair_x_start:hair_x_end]
-                colored = cv2.addWeighted(hair_region, 0.7, 
-                                         np.full_like(hair_region, avg_color), 0.3, 0)
-                result[hair_y_start:hair_y_end, hair_x_start:hair_x_end] = colored
+        The track table is shared by worker threads; it is only touched under
+        _face_tracks_lock, but the detection itself runs outside the lock so
+        sessions don't wait on each other's cascades.
+        """
+        if stream_id is None or not self.face_motion_threshold:
+            return self._detect_faces(image)
+        
+        thumbnail = cv2.cvtColor(
+            cv2.resize(image, (64, 64), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY
+        )
+        
+        with self._face_tracks_lock:
+            track = self._face_tracks.get(stream_id)
+            if track is not None:
+                self._face_tracks.move_to_end(stream_id)
+            releases = self._face_track_releases
+        
+        if track is not None and track[0] == image.shape:
+            change = cv2.norm(thumbnail, track[1], cv2.NORM_L1) / thumbnail.size
+            if change < self.face_motion_threshold:
+                return track[2]
+        
+        faces = self._detect_faces(image)
+        with self._face_tracks_lock:
+            # Don't bring back a track that release_stream dropped while this
+            # frame was being detected
+            released = track is None and releases != self._face_track_releases
+            if self._face_tracks.get(stream_id) is track and not released:
+                self._face_tracks[stream_id] = (image.shape, thumbnail, faces)
+                self._face_tracks.move_to_end(stream_id)
+                while len(self._face_tracks) > self._max_face_tracks:
+                    self._face_tracks.popitem(last=False)
+        return faces
+    
+    def _detect_faces(self, image: np.ndarray) -> np.ndarray:
+        """Detect faces on a downscaled grayscale copy, returning boxes in image coordinates
+        
+        Face boxes only need to be roughly placed for the hair region, so the
+        cascade runs at face_detection_width instead of the full frame size.
+        """
+        face_cascade = self._get_face_cascade()
+        
+        height, width = image.shape[:2]
+        scale = 1.0
+        small_size = None
+        if self.face_detection_width and width > self.face_detection_width:
+            scale = width / self.face_detection_width
+            small_size = (self.face_detection_width, max(1, round(height / scale)))
+        
+        # Optionally ignore faces narrower than face_min_size_ratio of the
+        # detection image; the smallest pyramid scales hold most of the
+        # cascade's sliding windows. 0 keeps the cascade's native 24 px minimum.
+        detection_width = small_size[0] if small_size is not None else width
+        min_face = int(detection_width * self.face_min_size_ratio)
+        
+        if self.use_opencl:
+            # Transparent API: with a UMat input the color conversion, resize
+            # and cascade run as OpenCL kernels on the GPU/iGPU
+            try:
+                faces = self._run_face_cascade(face_cascade, cv2.UMat(image), small_size, min_face)
+            except cv2.error as e:
+                logger.warning(f"OpenCL face detection failed, falling back to CPU: {e}")
+                self.use_opencl = False
+                faces = self._run_face_cascade(face_cascade, image, small_size, min_face)
+        else:
+            faces = self._run_face_cascade(face_cascade, image, small_size, min_face)
+        
+        if len(faces) > 0 and scale != 1.0:
+            faces = np.rint(faces * scale).astype(np.int32)
+        return faces
+    
+    def _get_face_cascade(self) -> cv2.CascadeClassifier:
+        """Face cascade for the calling thread, parsed from XML only on first use"""
+        face_cascade = getattr(self._cascade_local, "face_cascade", None)
+        if face_cascade is None:
+            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            self._cascade_local.face_cascade = face_cascade
+        return face_cascade
+    
+    @staticmethod
+    def _run_face_cascade(face_cascade, image, small_size: Optional[Tuple[int, int]], min_face: int):
+        """Grayscale, optionally downscale, and run the cascade (ndarray or UMat input)"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if small_size is not None:
+            gray = cv2.resize(gray, small_size, interpolation=cv2.INTER_AREA)
+        return face_cascade.detectMultiScale(gray, 1.1, 4, minSize=(min_face, min_face))
+    
+    @staticmethod
+    def _hair_regions(faces, image_width: int) -> List[Tuple[slice, slice]]:
+        """Hair region (rows, cols) slices for each detected face
+        
+        The hair region is typically above the face, slightly wider than it.
+        """
+        regions = []
+        for (x, y, w, h) in faces:
+            hair_y_start = max(0, y - int(h * 0.5))
+            hair_y_end = y + int(h * 0.2)
+            hair_x_start = max(0, x - int(w * 0.2))
+            hair_x_end = min(image_width, x + w + int(w * 0.2))
+            regions.append((slice(hair_y_start, hair_y_end), slice(hair_x_start, hair_x_end)))
+        return regions
+    
+    @staticmethod
+    def _regions_overlap(regions: List[Tuple[slice, slice]]) -> bool:
+        """Whether any two hair regions share pixels"""
+        for i, (rows_a, cols_a) in enumerate(regions):
+            for rows_b, cols_b in regions[i + 1:]:
+                if (rows_a.start < rows_b.stop and rows_b.start < rows_a.stop
+                        and cols_a.start < cols_b.stop and cols_b.start < cols_a.stop):
+                    return True
+        return False
+    
+    def _apply_hair_color(
+        self,
+        image: np.ndarray,
+        color_image: np.ndarray,
+        regions: List[Tuple[slice, slice]]
+    ) -> np.ndarray:
+        """Apply hair color to the given hair regions (in place; image is a working buffer)"""
+        result = image
+        
+        # Solid fill in the average color of the color image, cached across frames
+        color_fill = self._get_color_fill(color_image, image.shape)
+        
+        for region in regions:
+            # Apply color tint to hair region, writing straight into the view
+            hair_region = result[region]
+            cv2.addWeighted(hair_region, 0.7, color_fill[region], 0.3, 0, dst=hair_region)
         
         return result
+    
+    def _get_hair_overlay(
+        self,
+        style_image: np.ndarray,
+        style_resized: np.ndarray,
+        color_image: np.ndarray
+    ) -> np.ndarray:
+        """Frame-sized mix of the style image and color fill for the fused hair blend
+        
+        0.7 * (0.6 * src + 0.4 * style) + 0.3 * color
+            = 0.42 * src + (0.28 * style + 0.3 * color)
+        The overlay holds the bracketed term in float32, so the blend rounds to
+        uint8 only once. The style, color and frame size are fixed for a
+        video/session, so the overlay is built once and only the per-region
+        blend runs per frame.
+        """
+        shape = style_resized.shape
+        
+        def overlay() -> np.ndarray:
+            # Solid fill in the average color of the color image
+            color_fill = self._get_color_fill(color_image, shape)
+            return cv2.addWeighted(style_resized, 0.28, color_fill, 0.3, 0, dtype=cv2.CV_32F)
+        
+        return self._hair_overlay_cache.get((style_image, color_image), shape, overlay)
+    
+    def _get_style_resized(self, style_image: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        """Style image resized to the frame size, reused while both stay the same
+        
+        The cached array is only ever read (as a blend source), never written.
+        """
+        return self._style_resized_cache.get(
+            (style_image,), shape, lambda: cv2.resize(style_image, (shape[1], shape[0]))
+        )
+    
+    def _get_color_fill(self, color_image: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        """Frame-sized solid image in the color image's average color
+        
+        The color image and frame size are fixed for a session/video, so the
+        mean and the fill buffer are computed once and reused for every frame.
+        """
+        return self._color_fill_cache.get(
+            (color_image,), shape,
+            lambda: np.full(shape, np.mean(color_image, axis=(0, 1)), dtype=np.uint8)
+        )
 
 
 class AIService:
@@ -313,15 +704,24 @@ class AIService:
         self, 
         frame: np.ndarray, 
         style_image: np.ndarray,
-        color_image: Optional[np.ndarray] = None
+        color_image: Optional[np.ndarray] = None,
+        stream_id: Optional[str] = None
     ) -> Tuple[np.ndarray, float]:
-        """Process a single frame with hair style transfer"""
-        import time
-        start_time = time.time()
+        """Process a single frame with hair style transfer
+        
+        Pass a stream_id for consecutive frames of one video/session so the
+        model can reuse per-stream state such as face boxes.
+        """
+        start_time = time.perf_counter()
         
         try:
-            result = await self.hair_model.apply_hairstyle(frame, style_image, color_image)
-            processing_time = (time.time() - start_time) * 1000
+            if stream_id is None:
+                result = await self.hair_model.apply_hairstyle(frame, style_image, color_image)
+            else:
+                result = await self.hair_model.apply_hairstyle(
+                    frame, style_image, color_image, stream_id=stream_id
+                )
+            processing_time = (time.perf_counter() - start_time) * 1000
             
             # Update stats
             self.processing_stats["total_processed"] += 1
@@ -331,9 +731,49 @@ class AIService:
         except Exception as e:
             logger.error(f"Frame processing failed: {e}")
             self.processing_stats["failed_count"] += 1
-            processing_time = (time.time() - start_time) * 1000
+            processing_time = (time.perf_counter() - start_time) * 1000
             return frame, processing_time
     
+    async def iter_processed_frames(
+        self,
+        frames: Iterable[np.ndarray],
+        style_image: np.ndarray,
+        color_image: Optional[np.ndarray] = None
+    ) -> AsyncIterator[Tuple[np.ndarray, float]]:
+        """Yield (processed_frame, processing_time_ms) as each frame is processed
+        
+        Takes any iterable, e.g. VideoService.iter_frames, so decode, processing
+        and writing can run as one streaming pass without holding the clip.
+        Frames from a lazy iterator (which may block waiting on a decoder) are
+        pulled on a worker thread so the event loop is never stalled.
+        """
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        stream_id = f"video-{uuid.uuid4()}"
+        in_memory = isinstance(frames, (list, tuple))
+        frame_iter = iter(frames)
+        i = 0
+        
+        try:
+            while True:
+                if in_memory:
+                    frame = next(frame_iter, _NO_FRAME)
+                else:
+                    frame = await asyncio.to_thread(next, frame_iter, _NO_FRAME)
+                if frame is _NO_FRAME:
+                    break
+                i += 1
+                
+                processed_frame, processing_time = await self.process_frame(
+                    frame, style_image, color_image, stream_id=stream_id
+                )
+                
+                if debug_enabled:
+                    logger.debug(f"Processed frame {i} in {processing_time:.2f}ms")
+                
+                yield processed_frame, processing_time
+        finally:
+            self.release_stream(stream_id)
+    
     async def process_video_frames(
         self, 
         frames: list, 
@@ -344,16 +784,13 @@ class AIService:
         processed_frames = []
         total_processing_time = 0
         
-        for i, frame in enumerate(frames):
-            processed_frame, processing_time = await self.process_frame(
-                frame, style_image, color_image
-            )
+        async for processed_frame, processing_time in self.iter_processed_frames(
+            frames, style_image, color_image
+        ):
             processed_frames.append(processed_frame)
             total_processing_time += processing_time
-            
-            logger.info(f"Processed frame {i+1}/{len(frames)} in {processing_time:.2f}ms")
         
-        avg_processing_time = total_processing_time / len(frames) if frames else 0
+        avg_processing_time = total_processing_time / len(processed_frames) if processed_frames else 0
         self.processing_stats["average_processing_time"] = avg_processing_time
         
         if self.processing_stats["total_processed"] > 0:
@@ -364,6 +801,10 @@ class AIService:
         
         return processed_frames
     
+    def release_stream(self, stream_id: str) -> None:
+        """Release per-stream model state once a video or session ends"""
+        self.hair_model.release_stream(stream_id)
+    
     def get_processing_stats(self) -> dict:
         """Get processing statistics"""
         return self.processing_stats.copy()
@@ -29,6 +29,8 @@ class DatabaseService:
         try:
             result_dict = result.dict()
             result_dict["_id"] = str(ObjectId())
+            # Keep the stored id in step with the document key it is looked up by
+            result_dict["id"] = result_dict["_id"]
             result_dict["created_at"] = datetime.utcnow()
             result_dict["updated_at"] = datetime.utcnow()
             
@@ -3,6 +3,7 @@ import logging
 import json
 import asyncio
 from typing import Optional, Dict, Any
+from app.services.temp_storage_service import upload_to_temp_storage
 
 logger = logging.getLogger(__name__)
 
@@ -23,31 +24,7 @@ class MagicAPIService:
         """
         Upload image to temporary storage (tmpfiles.org) to get a public URL
         """
-        try:
-            url = "https://tmpfiles.org/api/v1/upload"
-            data = aiohttp.FormData()
-            data.add_field('file', image_data, filename='image.jpg', content_type='image/jpeg')
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("status") == "success":
-                            # Convert to direct download link
-                            # From: https://tmpfiles.org/12345/image.jpg
-                            # To:   https://tmpfiles.org/dl/12345/image.jpg
-                            page_url = result.get("data", {}).get("url")
-                            if page_url:
-                                direct_url = page_url.replace("tmpfiles.org/", "tmpfiles.org/dl/")
-                                if direct_url.startswith("http://"):
-                                    direct_url = direct_url.replace("http://", "https://")
-                                return direct_url
-            
-            logger.error(f"Tmpfiles upload failed: {response.status}")
-            return None
-        except Exception as e:
-            logger.error(f"Failed to upload to temp storage: {e}")
-            return None
+        return await upload_to_temp_storage(image_data)
 
     async def generate_hairstyle(self, image_data: bytes, prompt: str) -> Optional[str]:
         """
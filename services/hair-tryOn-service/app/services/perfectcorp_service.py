@@ -11,6 +11,7 @@ import logging
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import json
+from collections import Counter
 from pathlib import Path
 import asyncio
 import time
@@ -42,7 +43,7 @@ class PerfectCorpService:
             api_url: PerfectCorp API base URL
             cache_ttl: Cache TTL (not used in static mode)
         """
-        print("🔵 PerfectCorpService.__init__ called!")  # Debug print
+        logger.debug("PerfectCorpService initialised")
         
         # API Configuration
         self.api_key = api_key
@@ -54,41 +55,44 @@ class PerfectCorpService:
         # Token management
         self.access_token = None
         self.token_expiry = datetime.min
+        self._public_key = None  # Parsed lazily from secret_key, reused across auth calls
         
         # Static data configuration
         self.static_data_path = Path(__file__).parent.parent / "data" / "hairstyles.json"
-        print(f"🔵 Static data path: {self.static_data_path}")  # Debug print
+        logger.debug("Static data path: %s", self.static_data_path)
+        # Filled by initialize() at app startup, so importing the router
+        # doesn't parse the JSON and requests never do
         self.hairstyles: List[Dict] = []
-        print(f"🔵 About to load static data...")  # Debug print
-        self._load_static_data()
-        print(f"🔵 After _load_static_data, hairstyles count: {len(self.hairstyles)}")  # Debug print
+        self.gender_counts: Dict[str, int] = {}
         
         if self.api_enabled:
             logger.info(f"✅ PerfectCorp API enabled with base URL: {self.api_url}")
         else:
             logger.warning("⚠️ PerfectCorp API key not provided - AI hairstyle generation disabled")
     
+    async def initialize(self) -> None:
+        """Load the static hairstyles off the event loop (called at app startup)"""
+        await asyncio.to_thread(self._load_static_data)
+    
     def _load_static_data(self) -> None:
         """Load hairstyles from static JSON file"""
         try:
-            print(f"🔵 _load_static_data() called!")  # Debug print
             logger.info(f"📂 Loading static hairstyles from: {self.static_data_path}")
             
             if not self.static_data_path.exists():
-                print(f"❌ File NOT found: {self.static_data_path}")  # Debug print
                 logger.error(f"❌ Static data file not found: {self.static_data_path}")
                 self.hairstyles = []
+                self.gender_counts = {}
                 return
             
-            print(f"✅ File found, opening...")  # Debug print
             with open(self.static_data_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            print(f"✅ JSON loaded, data keys: {data.keys()}")  # Debug print
+            logger.debug("JSON loaded, data keys: %s", list(data.keys()))
             
             # Extract hairstyles array from the JSON structure
             hairstyles_data = data.get('hairstyles', [])
-            print(f"✅ Hairstyles array length: {len(hairstyles_data)}")  # Debug print
+            logger.debug("Hairstyles array length: %d", len(hairstyles_data))
             
             # Transform the data to match expected format
             self.hairstyles = []
@@ -102,32 +106,22 @@ class PerfectCorpService:
                 }
                 self.hairstyles.append(hairstyle)
             
-            print(f"✅ Successfully transformed {len(self.hairstyles)} hairstyles")  # Debug print
             logger.info(f"✅ Successfully loaded {len(self.hairstyles)} hairstyles from static file")
             
-            # Log gender breakdown
+            # Gender breakdown, computed once here and reused by the routes
+            self.gender_counts = dict(Counter(h['gender'] for h in self.hairstyles))
             if self.hairstyles:
-                male_count = sum(1 for h in self.hairstyles if h.get('gender', '').lower() == 'male')
-                female_count = sum(1 for h in self.hairstyles if h.get('gender', '').lower() == 'female')
+                male_count = self.gender_counts.get('male', 0)
+                female_count = self.gender_counts.get('female', 0)
                 other_count = len(self.hairstyles) - male_count - female_count
-                print(f"📊 Gender breakdown - Male: {male_count}, Female: {female_count}, Other: {other_count}")
                 logger.info(f"📊 Gender breakdown - Male: {male_count}, Female: {female_count}, Other: {other_count}")
-                
-                # Sample male and female hairstyles
-                male_samples = [h['id'] for h in self.hairstyles if h.get('gender', '').lower() == 'male'][:3]
-                female_samples = [h['id'] for h in self.hairstyles if h.get('gender', '').lower() == 'female'][:3]
-                print(f"📋 Sample Male IDs: {male_samples}")
-                print(f"📋 Sample Female IDs: {female_samples}")
-                logger.info(f"📋 Sample Male IDs: {male_samples}")
-                logger.info(f"📋 Sample Female IDs: {female_samples}")
             
         except Exception as e:
-            print(f"❌ EXCEPTION in _load_static_data: {str(e)}")  # Debug print
             logger.error(f"❌ Error loading static data: {str(e)}")
             import traceback
-            print(traceback.format_exc())  # Debug print
             logger.error(f"Traceback: {traceback.format_exc()}")
             self.hairstyles = []
+            self.gender_counts = {}
     
     async def fetch_hairstyles(
         self,
@@ -151,31 +145,24 @@ class PerfectCorpService:
             Dictionary with pagination info and hairstyles
         """
         try:
-            print(f"🔵 fetch_hairstyles() called - Total hairstyles in memory: {len(self.hairstyles)}")  # Debug print
             logger.info(f"📄 Fetching hairstyles - Page: {page}, Size: {page_size}, Gender: {gender}")
             
             # Filter by gender if specified
             filtered_styles = self.hairstyles
             if gender:
                 filtered_styles = [h for h in self.hairstyles if h.get('gender', 'unisex').lower() == gender.lower()]
-                print(f"🔵 Gender filter applied: '{gender}' -> {len(filtered_styles)} hairstyles")
-            else:
-                print(f"🔵 No gender filter - returning all {len(filtered_styles)} hairstyles")
-            
-            print(f"🔵 After gender filter: {len(filtered_styles)} hairstyles")  # Debug print
+            logger.debug("After gender filter '%s': %d hairstyles", gender, len(filtered_styles))
             
             # Calculate pagination
             total = len(filtered_styles)
             start_idx = (page - 1) * page_size
             end_idx = start_idx + page_size
             
-            print(f"🔵 Pagination: start={start_idx}, end={end_idx}, total={total}")  # Debug print
+            logger.debug("Pagination: start=%d, end=%d, total=%d", start_idx, end_idx, total)
             
             # Get page data
             page_data = filtered_styles[start_idx:end_idx]
             
-            print(f"🔵 Page data count: {len(page_data)}")  # Debug print
-            
             result = {
                 'data': page_data,
                 'pagination': {
@@ -186,7 +173,6 @@ class PerfectCorpService:
                 }
             }
             
-            print(f"🔵 Result structure: {list(result.keys())}")  # Debug print
             logger.info(f"✅ Returning {len(page_data)} hairstyles (Total: {total})")
             return result
             
@@ -321,6 +307,19 @@ class PerfectCorpService:
             logger.error(f"❌ Error during authentication: {str(e)}")
             return None
 
+    def _get_public_key(self):
+        """Parse the PEM public key (secret_key) once and reuse it"""
+        if self._public_key is None:
+            key_str = self.secret_key
+            if not key_str.startswith("-----BEGIN PUBLIC KEY-----"):
+                key_str = f"-----BEGIN PUBLIC KEY-----\n{key_str}\n-----END PUBLIC KEY-----"
+
+            self._public_key = serialization.load_pem_public_key(
+                key_str.encode('utf-8'),
+                backend=default_backend()
+            )
+        return self._public_key
+
     def _generate_id_token(self) -> Optional[str]:
         """Generate encrypted ID token using RSA Public Key (Secret Key)"""
         try:
@@ -335,23 +334,13 @@ class PerfectCorpService:
             data = f"client_id={self.api_key}&timestamp={timestamp}".encode('utf-8')
             logger.info(f"📝 Data to encrypt: {data}")
 
-            # 2. Load Public Key
-            key_str = self.secret_key
-            if not key_str.startswith("-----BEGIN PUBLIC KEY-----"):
-                key_str = f"-----BEGIN PUBLIC KEY-----\n{key_str}\n-----END PUBLIC KEY-----"
-                
-            public_key = serialization.load_pem_public_key(
-                key_str.encode('utf-8'),
-                backend=default_backend()
-            )
-
-            # 3. Encrypt (PKCS1v15 padding)
-            encrypted = public_key.encrypt(
+            # 2. Encrypt with the cached public key (PKCS1v15 padding)
+            encrypted = self._get_public_key().encrypt(
                 data,
                 padding.PKCS1v15()
             )
 
-            # 4. Base64 Encode
+            # 3. Base64 Encode
             return base64.b64encode(encrypted).decode('utf-8')
         except Exception as e:
             logger.error(f"❌ Encryption error: {e}")
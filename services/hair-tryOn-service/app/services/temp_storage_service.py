@@ -0,0 +1,41 @@
+import aiohttp
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TMPFILES_UPLOAD_URL = "https://tmpfiles.org/api/v1/upload"
+
+
+async def upload_to_temp_storage(image_data: bytes, filename: str = "image.jpg") -> Optional[str]:
+    """
+    Upload image to temporary storage (tmpfiles.org) to get a public URL
+    
+    Returns the direct download URL, or None if the upload failed.
+    """
+    try:
+        data = aiohttp.FormData()
+        data.add_field('file', image_data, filename=filename, content_type='image/jpeg')
+        
+        async with aiohttp.ClientSession() as session:
+            async with session.post(TMPFILES_UPLOAD_URL, data=data) as response:
+                if response.status != 200:
+                    logger.error(f"Tmpfiles upload failed: {response.status}")
+                    return None
+                
+                result = await response.json()
+                page_url = result.get("data", {}).get("url") if result.get("status") == "success" else None
+                if not page_url:
+                    logger.error(f"Tmpfiles upload returned no URL: {result}")
+                    return None
+                
+                # Convert to direct download link
+                # From: https://tmpfiles.org/12345/image.jpg
+                # To:   https://tmpfiles.org/dl/12345/image.jpg
+                direct_url = page_url.replace("tmpfiles.org/", "tmpfiles.org/dl/")
+                if direct_url.startswith("http://"):
+                    direct_url = direct_url.replace("http://", "https://")
+                return direct_url
+    except Exception as e:
+        logger.error(f"Failed to upload to temp storage: {e}")
+        return None
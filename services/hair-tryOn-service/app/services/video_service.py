@@ -1,22 +1,73 @@
+import asyncio
 import cv2
 import numpy as np
 import os
+import queue
+import shutil
+import subprocess
 import tempfile
+import threading
 import aiofiles
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional
 from fastapi import HTTPException, UploadFile
 from app.core.config import settings
 from app.models.hair_tryOn import VideoUploadResponse, ProcessingMetadata
+from app.services.ai_service import ai_service
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of the decoded frame stream
+_END_OF_STREAM = object()
+
+# Sampling steps at least this large seek to each sampled frame instead of
+# grabbing through the gap. A seek restarts decoding at the preceding
+# keyframe, so it only pays off when the gap is a sizeable part of a GOP.
+_SEEK_MIN_STEP = 12
+
+class _FFmpegPipeWriter:
+    """cv2.VideoWriter stand-in that pipes raw BGR frames into an ffmpeg encoder
+    
+    Encoding runs in the ffmpeg process, off the Python thread, and produces
+    H.264 instead of OpenCV's mp4v.
+    """
+    
+    def __init__(self, output_path: str, fps: float, frame_size: Tuple[int, int], encoder: str, preset: str):
+        width, height = frame_size
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", encoder, "-preset", preset, "-pix_fmt", "yuv420p",
+            output_path,
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    
+    def isOpened(self) -> bool:
+        return self._process.poll() is None
+    
+    def write(self, frame: np.ndarray) -> None:
+        self._process.stdin.write(np.ascontiguousarray(frame).data)
+    
+    def release(self) -> None:
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._process.wait() != 0:
+            logger.error(f"ffmpeg exited with code {self._process.returncode}")
+
 class VideoService:
     def __init__(self):
         self.max_duration = settings.max_video_duration
         self.max_size = settings.max_video_size
         self.allowed_formats = settings.allowed_video_formats
         self.sampling_rate = settings.frame_sampling_rate
+        # Set once the upload directory is known to exist
+        self._upload_dir_ready = False
+        # Caps videos in flight, since every video buffers its own frames
+        self._video_slots = asyncio.Semaphore(max(1, settings.max_concurrent_videos))
         
     async def validate_video(self, file: UploadFile) -> dict:
         """Validate uploaded video file"""
@@ -49,8 +100,10 @@ class VideoService:
         file_extension = file.filename.split('.')[-1].lower()
         file_path = os.path.join(settings.upload_dir, f"{upload_id}.{file_extension}")
         
-        # Ensure upload directory exists
-        os.makedirs(settings.upload_dir, exist_ok=True)
+        # Ensure upload directory exists; only the first upload pays for the syscall
+        if not self._upload_dir_ready:
+            os.makedirs(settings.upload_dir, exist_ok=True)
+            self._upload_dir_ready = True
         
         async with aiofiles.open(file_path, 'wb') as f:
             content = await file.read()
@@ -88,51 +141,334 @@ class VideoService:
             "resolution": {"width": width, "height": height}
         }
     
-    def extract_frames(self, video_path: str, sampling_rate: Optional[float] = None) -> List[np.ndarray]:
-        """Extract frames from video with sampling"""
+    def iter_frames(
+        self,
+        video_path: str,
+        sampling_rate: Optional[float] = None,
+        target_size: Optional[Tuple[int, int]] = None,
+        stop_event: Optional[threading.Event] = None
+    ) -> Iterator[np.ndarray]:
+        """Yield sampled frames while a background thread decodes ahead
+        
+        With target_size (width, height), frames are resized on the reader
+        thread, so consumers get processing-size frames without a separate
+        resize pass and the queue holds smaller buffers.
+        
+        Setting stop_event from another thread stops the reader early; a
+        consumer waiting for a frame then sees the end of the stream, so the
+        generator can be stopped while a next() call is still in flight.
+        """
         if sampling_rate is None:
             sampling_rate = self.sampling_rate
-            
-        cap = cv2.VideoCapture(video_path)
-        frames = []
-        frame_count = 0
+        step = max(1, int(1 / sampling_rate))
+        
+        # Bounded so decoding can't run arbitrarily far ahead of the consumer
+        frame_queue: queue.Queue = queue.Queue(maxsize=settings.frame_queue_size)
+        if stop_event is None:
+            stop_event = threading.Event()
+        
+        def put(item) -> bool:
+            while not stop_event.is_set():
+                try:
+                    frame_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def reader():
+            cap = self._open_video_capture(video_path)
+            frame_count = 0
+            sampled_count = 0
+            try:
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                seek = step >= _SEEK_MIN_STEP and total_frames > 0
+                
+                while True:
+                    # Sample frames based on sampling rate
+                    if frame_count % step == 0:
+                        ret, frame = cap.read()
+                        if not ret:
+                            break
+                        if target_size is not None and (frame.shape[1], frame.shape[0]) != target_size:
+                            frame = cv2.resize(frame, target_size, interpolation=cv2.INTER_AREA)
+                        if not put(frame):
+                            return
+                        sampled_count += 1
+                        frame_count += 1
+                    elif seek:
+                        # Jump straight to the next sampled frame
+                        next_frame = frame_count + step - frame_count % step
+                        if next_frame >= total_frames:
+                            frame_count = total_frames
+                            break
+                        if cap.set(cv2.CAP_PROP_POS_FRAMES, next_frame):
+                            frame_count = next_frame
+                        else:
+                            # Container can't seek; decode through the gap instead
+                            seek = False
+                    # grab() only demuxes and decodes; the BGR conversion and the
+                    # ndarray copy happen in retrieve(), so skipped frames never pay them
+                    elif cap.grab():
+                        frame_count += 1
+                    else:
+                        break
+                
+                logger.info(f"Extracted {sampled_count} frames from {frame_count} total frames")
+            except Exception as e:
+                put(e)
+            finally:
+                cap.release()
+                if not put(_END_OF_STREAM):
+                    # Stopped with a possibly full queue; drop what's left so
+                    # a consumer blocked in get() still receives the end marker
+                    try:
+                        while True:
+                            frame_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                    frame_queue.put_nowait(_END_OF_STREAM)
+        
+        reader_thread = threading.Thread(target=reader, name="video-frame-reader", daemon=True)
+        reader_thread.start()
         
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                item = frame_queue.get()
+                if item is _END_OF_STREAM:
                     break
-                
-                # Sample frames based on sampling rate
-                if frame_count % int(1 / sampling_rate) == 0:
-                    frames.append(frame)
-                
-                frame_count += 1
-                
+                if isinstance(item, Exception):
+                    raise item
+                yield item
         finally:
-            cap.release()
+            stop_event.set()
+            reader_thread.join()
+    
+    def _open_video_capture(self, video_path: str) -> cv2.VideoCapture:
+        """Open a capture for decoding, with hardware decode when VIDEO_HW_DECODE is set
         
-        logger.info(f"Extracted {len(frames)} frames from {frame_count} total frames")
-        return frames
+        VIDEO_ACCELERATION_ANY lets FFmpeg pick NVDEC/VAAPI/QSV/D3D11 and
+        silently falls back to software decoding when none is usable; frames
+        still come out as BGR ndarrays.
+        """
+        if settings.video_hw_decode and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            cap = cv2.VideoCapture(
+                video_path,
+                cv2.CAP_FFMPEG,
+                [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+            )
+            if cap.isOpened():
+                return cap
+            logger.warning("Hardware-accelerated capture failed to open, using default backend")
+        return cv2.VideoCapture(video_path)
+    
+    def extract_frames(
+        self,
+        video_path: str,
+        sampling_rate: Optional[float] = None,
+        target_size: Optional[Tuple[int, int]] = None
+    ) -> List[np.ndarray]:
+        """Extract frames from video with sampling"""
+        return list(self.iter_frames(video_path, sampling_rate, target_size))
     
-    def reconstruct_video(self, frames: List[np.ndarray], output_path: str, fps: float) -> str:
-        """Reconstruct video from processed frames"""
-        if not frames:
+    def reconstruct_video(self, frames: Iterable[np.ndarray], output_path: str, fps: float) -> str:
+        """Reconstruct video from processed frames
+        
+        Accepts any iterable (e.g. a generator over iter_frames), so frames can be
+        streamed straight into the writer without holding the whole clip in memory.
+        """
+        frames = iter(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
             raise ValueError("No frames to reconstruct video")
         
-        height, width, channels = frames[0].shape
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        height, width, channels = first_frame.shape
+        out = self._open_video_writer(output_path, fps, (width, height))
+        
+        # Encoding runs on a writer thread (OpenCV releases the GIL while it
+        # encodes), so producing the next frame overlaps with writing this one.
+        # VIDEO_WRITE_BUFFER_MB can let the queue grow past FRAME_QUEUE_SIZE so
+        # a slow disk or encoder falls further behind before the producer waits
+        write_queue: queue.Queue = queue.Queue(maxsize=self._write_buffer_frames(first_frame))
+        errors: List[BaseException] = []
+        
+        def writer():
+            try:
+                while True:
+                    frame = write_queue.get()
+                    if frame is _END_OF_STREAM:
+                        return
+                    out.write(frame)
+            except BaseException as e:
+                errors.append(e)
+                # Keep draining so the producer never blocks on a full queue
+                while write_queue.get() is not _END_OF_STREAM:
+                    pass
         
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        thread = threading.Thread(target=writer, name="video-writer", daemon=True)
+        thread.start()
         
         try:
+            write_queue.put(first_frame)
             for frame in frames:
-                out.write(frame)
+                if errors:
+                    break
+                write_queue.put(frame)
         finally:
+            write_queue.put(_END_OF_STREAM)
+            thread.join()
             out.release()
         
+        if errors:
+            raise errors[0]
+        
+        return output_path
+    
+    async def process_video(
+        self,
+        video_path: str,
+        output_path: str,
+        style_image: np.ndarray,
+        color_image: Optional[np.ndarray] = None,
+        target_size: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """Apply a hairstyle to a video as three overlapping stages
+        
+        Decoding runs on iter_frames' reader thread, the model on worker
+        threads and encoding on reconstruct_video's writer thread. Bounded
+        queues connect them, so all stages run at once and the wall time
+        approaches the slowest stage instead of the sum of all three.
+        With target_size, frames are processed and written at that size.
+        
+        At most MAX_CONCURRENT_VIDEOS videos run at once; each holds its own
+        frame queues, so further calls wait for a slot.
+        """
+        async with self._video_slots:
+            return await self._process_video(
+                video_path, output_path, style_image, color_image, target_size
+            )
+    
+    async def _process_video(
+        self,
+        video_path: str,
+        output_path: str,
+        style_image: np.ndarray,
+        color_image: Optional[np.ndarray],
+        target_size: Optional[Tuple[int, int]]
+    ) -> str:
+        info = await asyncio.to_thread(self.get_video_info, video_path)
+        step = max(1, int(1 / self.sampling_rate))
+        output_fps = info["fps"] / step if info["fps"] > 0 else 30.0
+        
+        stop_reading = threading.Event()
+        frames = self.iter_frames(video_path, target_size=target_size, stop_event=stop_reading)
+        # Held while a worker thread is inside next(frames), so shutdown can
+        # wait for an in-flight pull instead of closing a running generator
+        frames_lock = threading.Lock()
+        
+        def pull_frames() -> Iterator[np.ndarray]:
+            while True:
+                with frames_lock:
+                    frame = next(frames, _END_OF_STREAM)
+                if frame is _END_OF_STREAM:
+                    return
+                yield frame
+        
+        processed_queue: queue.Queue = queue.Queue(maxsize=settings.frame_queue_size)
+        stream_ended = threading.Event()
+        
+        def processed_frames() -> Iterator[np.ndarray]:
+            while True:
+                frame = processed_queue.get()
+                if frame is _END_OF_STREAM:
+                    stream_ended.set()
+                    return
+                yield frame
+        
+        def write_video() -> str:
+            try:
+                return self.reconstruct_video(processed_frames(), output_path, output_fps)
+            except BaseException:
+                # Keep draining until the end marker so the producer's
+                # blocking hand-offs can never hang on a failed writer
+                while not stream_ended.is_set():
+                    if processed_queue.get() is _END_OF_STREAM:
+                        stream_ended.set()
+                raise
+        
+        writer = asyncio.ensure_future(asyncio.to_thread(write_video))
+        pending_put: Optional[asyncio.Future] = None
+        
+        async def hand_off(item) -> None:
+            """Queue an item for the writer, blocking on a worker thread while it's full"""
+            nonlocal pending_put
+            try:
+                processed_queue.put_nowait(item)
+            except queue.Full:
+                # Shielded so a cancelled caller can still wait for this put
+                # to land before queueing the end marker behind it
+                pending_put = asyncio.ensure_future(asyncio.to_thread(processed_queue.put, item))
+                await asyncio.shield(pending_put)
+                pending_put = None
+        
+        processed = ai_service.iter_processed_frames(pull_frames(), style_image, color_image)
+        try:
+            async for processed_frame, _ in processed:
+                if writer.done():
+                    # The writer failed; its error is raised below
+                    break
+                await hand_off(processed_frame)
+        finally:
+            await processed.aclose()
+            # Stop the reader, wait out a pull that may still be running on a
+            # worker thread (e.g. after cancellation), then close the generator,
+            # which joins the reader thread
+            stop_reading.set()
+            await asyncio.to_thread(frames_lock.acquire)
+            try:
+                frames.close()
+            finally:
+                frames_lock.release()
+            if pending_put is not None:
+                await pending_put
+            await hand_off(_END_OF_STREAM)
+            # Surfaces writer errors (including "No frames to reconstruct video")
+            await writer
+        
         return output_path
     
+    @staticmethod
+    def _write_buffer_frames(frame: np.ndarray) -> int:
+        """Writer queue length: FRAME_QUEUE_SIZE, or more if VIDEO_WRITE_BUFFER_MB allows
+        
+        The budget is per video; up to MAX_CONCURRENT_VIDEOS videos each get
+        their own buffer.
+        """
+        budget = settings.video_write_buffer_mb * 1024 * 1024
+        return max(settings.frame_queue_size, budget // max(frame.nbytes, 1))
+    
+    def _open_video_writer(self, output_path: str, fps: float, frame_size: Tuple[int, int]) -> cv2.VideoWriter:
+        """Open a writer with the configured codec, falling back to mp4v if it's unavailable
+        
+        When FFMPEG_ENCODER is set and ffmpeg is on PATH, frames are piped to
+        ffmpeg instead.
+        """
+        if settings.ffmpeg_encoder:
+            if shutil.which("ffmpeg"):
+                return _FFmpegPipeWriter(
+                    output_path, fps, frame_size, settings.ffmpeg_encoder, settings.ffmpeg_preset
+                )
+            logger.warning("FFMPEG_ENCODER is set but ffmpeg was not found, using OpenCV writer")
+        
+        codec = settings.video_codec
+        out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*codec), fps, frame_size)
+        
+        if not out.isOpened() and codec != "mp4v":
+            logger.warning(f"Video codec '{codec}' not available, falling back to mp4v")
+            out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, frame_size)
+        
+        return out
+    
     def resize_frame(self, frame: np.ndarray, target_size: Tuple[int, int]) -> np.ndarray:
         """Resize frame to target size"""
         return cv2.resize(frame, target_size)
@@ -142,15 +478,15 @@ class VideoService:
         # Convert BGR to RGB
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
-        # Normalize pixel values
-        frame_normalized = frame_rgb.astype(np.float32) / 255.0
+        # Normalize pixel values (cast and scale in a single pass)
+        frame_normalized = np.divide(frame_rgb, np.float32(255.0), dtype=np.float32)
         
         return frame_normalized
     
     def postprocess_frame(self, frame: np.ndarray) -> np.ndarray:
         """Postprocess frame from AI model output"""
-        # Denormalize pixel values
-        frame_denorm = (frame * 255.0).astype(np.uint8)
+        # Denormalize pixel values (scale, saturate and cast to uint8 in a single pass)
+        frame_denorm = cv2.convertScaleAbs(frame, alpha=255.0)
         
         # Convert RGB to BGR
         frame_bgr = cv2.cvtColor(frame_denorm, cv2.COLOR_RGB2BGR)
@@ -161,9 +497,11 @@ class VideoService:
         """Clean up temporary files"""
         for file_path in file_paths:
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info(f"Cleaned up temporary file: {file_path}")
+                # Remove directly instead of stat-ing first: one syscall, no race
+                os.remove(file_path)
+                logger.info(f"Cleaned up temporary file: {file_path}")
+            except FileNotFoundError:
+                pass
             except Exception as e:
                 logger.error(f"Failed to cleanup file {file_path}: {e}")
 
@@ -2,7 +2,7 @@ import asyncio
 import json
 import time
 import uuid
-from typing import Dict, Optional, Set
+from typing import Dict, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from app.services.ai_service import ai_service
 from app.models.hair_tryOn import WebSocketMessage, FrameProcessingResult
@@ -14,6 +14,26 @@ import base64
 
 logger = logging.getLogger(__name__)
 
+# Live camera frames are encoded by the client canvas and carry no EXIF data,
+# so skip the orientation probe on the per-frame decode
+_FRAME_DECODE_FLAGS = cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+
+# Optional libjpeg-turbo encoder, resolved on first use
+_turbojpeg = None
+_turbojpeg_resolved = False
+
+def _get_turbojpeg():
+    """PyTurboJPEG encoder, or None when the package or libturbojpeg is missing"""
+    global _turbojpeg, _turbojpeg_resolved
+    if not _turbojpeg_resolved:
+        try:
+            from turbojpeg import TurboJPEG
+            _turbojpeg = TurboJPEG()
+        except (ImportError, OSError) as e:
+            logger.info(f"PyTurboJPEG not available, encoding frames with OpenCV: {e}")
+        _turbojpeg_resolved = True
+    return _turbojpeg
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time hair try-on"""
     
@@ -40,7 +60,9 @@ class ConnectionManager:
             "color_image": None,
             "last_activity": time.time()
         }
-        self.processing_queue[session_id] = asyncio.Queue(maxsize=10)
+        # Small queue: when the client sends faster than we process, stale frames
+        # are replaced by the newest one instead of building up latency
+        self.processing_queue[session_id] = asyncio.Queue(maxsize=settings.realtime_queue_size)
         
         logger.info(f"WebSocket connection established for session {session_id}")
         return True
@@ -51,8 +73,16 @@ class ConnectionManager:
             del self.active_connections[session_id]
         if session_id in self.connection_metadata:
             del self.connection_metadata[session_id]
-        if session_id in self.processing_queue:
-            del self.processing_queue[session_id]
+        queue = self.processing_queue.pop(session_id, None)
+        if queue is not None:
+            # Wake the session's frame loop with the shutdown signal so it
+            # exits now instead of waiting on an empty queue
+            try:
+                queue.put_nowait(None)
+            except asyncio.QueueFull:
+                queue.get_nowait()
+                queue.put_nowait(None)
+        ai_service.release_stream(session_id)
         
         logger.info(f"WebSocket connection closed for session {session_id}")
     
@@ -113,7 +143,9 @@ class RealtimeProcessor:
     def __init__(self, connection_manager: ConnectionManager):
         self.connection_manager = connection_manager
         self.target_latency = settings.target_latency_ms / 1000.0  # Convert to seconds
+        self.target_latency_ms = float(settings.target_latency_ms)
         self.frame_drop_threshold = 0.3  # Drop frames if processing takes > 30% of target
+        self.max_frame_width = settings.realtime_max_width
         
     async def process_frame_stream(self, session_id: str):
         """Process frames from the queue for a session"""
@@ -125,20 +157,25 @@ class RealtimeProcessor:
         if not queue:
             return
         
-        while session_id in self.connection_manager.active_connections:
+        # Bind per-session state once instead of looking it up for every frame
+        active_connections = self.connection_manager.active_connections
+        send_message = self.connection_manager.send_message
+        
+        while session_id in active_connections:
             try:
-                # Wait for frame with timeout
-                frame_data = await asyncio.wait_for(queue.get(), timeout=1.0)
+                # Sleeps until a frame arrives; disconnect() enqueues None, so
+                # no timeout polling is needed to notice the session ending
+                frame_data = await queue.get()
                 
                 if frame_data is None:  # Shutdown signal
                     break
                 
                 # Process the frame
-                result = await self._process_single_frame(session_id, frame_data)
+                result = await self._process_single_frame(session_id, frame_data, metadata)
                 
                 if result:
                     # Send result back to client
-                    await self.connection_manager.send_message(session_id, {
+                    await send_message(session_id, {
                         "type": "frame_result",
                         "data": {
                             "frame_id": result.frame_id,
@@ -152,11 +189,9 @@ class RealtimeProcessor:
                 metadata["frames_processed"] += 1
                 metadata["total_processing_time"] += result.processing_time if result else 0
                 
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 logger.error(f"Frame processing error for session {session_id}: {e}")
-                await self.connection_manager.send_message(session_id, {
+                await send_message(session_id, {
                     "type": "error",
                     "data": {
                         "message": "Frame processing failed",
@@ -164,17 +199,22 @@ class RealtimeProcessor:
                     }
                 })
     
-    async def _process_single_frame(self, session_id: str, frame_data: dict) -> Optional[FrameProcessingResult]:
-        """Process a single frame"""
-        start_time = time.time()
+    async def _process_single_frame(
+        self,
+        session_id: str,
+        frame_data: dict,
+        metadata: Optional[dict] = None
+    ) -> Optional[FrameProcessingResult]:
+        """Process a single frame (metadata can be passed in by the stream loop)"""
+        start_time = time.perf_counter()
         
         try:
-            metadata = self.connection_manager.connection_metadata[session_id]
+            if metadata is None:
+                metadata = self.connection_manager.connection_metadata[session_id]
             
-            # Decode frame
-            frame_bytes = base64.b64decode(frame_data["frame_data"])
-            frame_array = np.frombuffer(frame_bytes, dtype=np.uint8)
-            frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+            # Decode frame off the event loop (OpenCV releases the GIL, so
+            # several sessions decode and encode in parallel)
+            frame = await asyncio.to_thread(self._decode_frame, frame_data["frame_data"], metadata)
             
             if frame is None:
                 logger.error("Failed to decode frame")
@@ -190,34 +230,98 @@ class RealtimeProcessor:
             
             # Process frame with AI
             processed_frame, ai_processing_time = await ai_service.process_frame(
-                frame, style_image, color_image
+                frame, style_image, color_image, stream_id=session_id
             )
             
-            # Encode result
-            _, encoded_frame = cv2.imencode('.jpg', processed_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            # Encode result and score it off the event loop
+            encoded_frame, quality_score = await asyncio.to_thread(self._encode_result, processed_frame)
             
-            processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+            processing_time = (time.perf_counter() - start_time) * 1000  # Convert to milliseconds
             
             # Check if we're meeting latency requirements
-            if processing_time > self.target_latency * 1000:
-                logger.warning(f"Processing time {processing_time:.2f}ms exceeds target {self.target_latency * 1000}ms")
+            if processing_time > self.target_latency_ms:
+                logger.warning(f"Processing time {processing_time:.2f}ms exceeds target {self.target_latency_ms}ms")
             
-            return FrameProcessingResult(
+            # Fields are produced here, so skip per-frame pydantic validation
+            return FrameProcessingResult.model_construct(
                 frame_id=frame_data.get("frame_id", str(uuid.uuid4())),
-                processed_frame_data=encoded_frame.tobytes(),
+                processed_frame_data=encoded_frame,
                 processing_time=processing_time,
-                quality_score=self._calculate_quality_score(processed_frame)
+                quality_score=quality_score
             )
             
         except Exception as e:
             logger.error(f"Frame processing failed: {e}")
             return None
     
+    def _decode_frame(self, frame_b64: str, metadata: dict) -> Optional[np.ndarray]:
+        """Decode a client frame and cap its width; None if it isn't an image"""
+        frame_bytes = base64.b64decode(frame_b64)
+        frame = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), _FRAME_DECODE_FLAGS)
+        if frame is None:
+            return None
+        
+        # Shrink oversized frames once, up front, so every later stage
+        # (detection, blending, encoding) works on fewer pixels
+        return self._limit_frame_width(frame, metadata)
+    
+    def _encode_result(self, processed_frame: np.ndarray) -> Tuple[bytes, float]:
+        """JPEG-encode a processed frame and compute its quality score
+        
+        Uses libjpeg-turbo through PyTurboJPEG when it's installed (SIMD
+        encode straight to bytes), otherwise OpenCV's encoder.
+        """
+        turbojpeg = _get_turbojpeg()
+        if turbojpeg is not None:
+            from turbojpeg import TJSAMP_420
+            # 4:2:0 matches OpenCV's default subsampling at this quality
+            encoded_frame = turbojpeg.encode(
+                np.ascontiguousarray(processed_frame), quality=80, jpeg_subsample=TJSAMP_420
+            )
+        else:
+            _, encoded = cv2.imencode('.jpg', processed_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            encoded_frame = encoded.tobytes()
+        return encoded_frame, self._calculate_quality_score(processed_frame)
+    
+    def _limit_frame_width(self, frame: np.ndarray, metadata: Optional[dict] = None) -> np.ndarray:
+        """Downscale frames wider than the configured maximum, keeping aspect ratio
+        
+        A stream keeps one resolution for the whole session, so with the
+        session's metadata the target size and the output buffer are worked
+        out on the first frame and reused until the input shape changes.
+        Frames of a session are processed one at a time and each result is
+        encoded before the next frame arrives, so the buffer is free to reuse.
+        """
+        plan = metadata.get("frame_plan") if metadata is not None else None
+        if plan is None or plan[0] != frame.shape:
+            plan = self._plan_frame_resize(frame.shape)
+            if metadata is not None:
+                metadata["frame_plan"] = plan
+        
+        _, target_size, buffer = plan
+        if target_size is None:
+            return frame
+        return cv2.resize(frame, target_size, dst=buffer, interpolation=cv2.INTER_AREA)
+    
+    def _plan_frame_resize(self, shape: Tuple[int, ...]) -> tuple:
+        """(input shape, target size or None, output buffer or None) for a frame shape"""
+        height, width = shape[:2]
+        if not self.max_frame_width or width <= self.max_frame_width:
+            return (shape, None, None)
+        
+        scale = self.max_frame_width / width
+        target_size = (self.max_frame_width, max(1, round(height * scale)))
+        buffer = np.empty((target_size[1], target_size[0]) + tuple(shape[2:]), dtype=np.uint8)
+        return (shape, target_size, buffer)
+    
     def _calculate_quality_score(self, frame: np.ndarray) -> float:
         """Calculate quality score for the processed frame"""
         # Simple quality metric based on image sharpness
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        # A 3x3 Laplacian of uint8 input fits in int16, a quarter of the CV_64F
+        # buffer; meanStdDev then reduces it in one pass
+        _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+        laplacian_var = float(stddev[0, 0]) ** 2
         
         # Normalize to 0-1 range (higher is better)
         quality_score = min(laplacian_var / 1000.0, 1.0)
@@ -230,6 +334,14 @@ class WebSocketService:
         self.connection_manager = ConnectionManager()
         self.processor = RealtimeProcessor(self.connection_manager)
         self.cleanup_task = None
+        self.websocket_timeout = settings.websocket_timeout
+        # Message type -> handler, resolved once instead of an if/elif chain per message
+        self._message_handlers = {
+            "set_style_image": self._handle_set_style_image,
+            "set_color_image": self._handle_set_color_image,
+            "process_frame": self._handle_process_frame,
+            "ping": self._handle_ping,
+        }
         
     async def start_service(self):
         """Start the WebSocket service"""
@@ -296,22 +408,20 @@ class WebSocketService:
     async def _process_message(self, session_id: str, message: dict):
         """Process incoming message"""
         message_type = message.get("type")
-        data = message.get("data", {})
+        handler = self._message_handlers.get(message_type)
         
-        if message_type == "set_style_image":
-            await self._handle_set_style_image(session_id, data)
-        elif message_type == "set_color_image":
-            await self._handle_set_color_image(session_id, data)
-        elif message_type == "process_frame":
-            await self._handle_process_frame(session_id, data)
-        elif message_type == "ping":
-            await self.connection_manager.send_message(session_id, {"type": "pong"})
+        if handler is not None:
+            await handler(session_id, message.get("data", {}))
         else:
             await self.connection_manager.send_message(session_id, {
                 "type": "error",
                 "data": {"message": f"Unknown message type: {message_type}"}
             })
     
+    async def _handle_ping(self, session_id: str, data: dict):
+        """Handle keep-alive ping"""
+        await self.connection_manager.send_message(session_id, {"type": "pong"})
+    
     async def _handle_set_style_image(self, session_id: str, data: dict):
         """Handle style image setting"""
         try:
@@ -370,7 +480,7 @@ class WebSocketService:
                 try:
                     queue.put_nowait(data)
                 except asyncio.QueueFull:
-                    # Drop oldest frame if queue is full
+                    # Drop oldest frame if queue is full so the newest one is processed next
                     try:
                         queue.get_nowait()
                         queue.put_nowait(data)
@@ -385,12 +495,13 @@ class WebSocketService:
             try:
                 await asyncio.sleep(60)  # Check every minute
                 
-                current_time = time.time()
-                inactive_sessions = []
-                
-                for session_id, metadata in self.connection_manager.connection_metadata.items():
-                    if current_time - metadata["last_activity"] > settings.websocket_timeout:
-                        inactive_sessions.append(session_id)
+                # Sessions last active before the cutoff have timed out
+                cutoff = time.time() - self.websocket_timeout
+                inactive_sessions = [
+                    session_id
+                    for session_id, metadata in self.connection_manager.connection_metadata.items()
+                    if metadata["last_activity"] < cutoff
+                ]
                 
                 for session_id in inactive_sessions:
                     logger.info(f"Cleaning up inactive session: {session_id}")
@@ -0,0 +1,317 @@
+import pytest
+import threading
+import cv2
+import numpy as np
+from unittest.mock import AsyncMock, patch
+
+from app.services.ai_service import LocalHairModel, ReplicateHairModel, _ImageCache
+
+
+def _two_pass_hair_transfer(source_image, style_image, color_image, faces):
+    """Reference: style blend per hair region, then color tint per region"""
+    result = source_image.copy()
+    style_resized = cv2.resize(style_image, (source_image.shape[1], source_image.shape[0]))
+    regions = LocalHairModel._hair_regions(faces, source_image.shape[1])
+    for region in regions:
+        hair_region = result[region]
+        cv2.addWeighted(hair_region, 0.6, style_resized[region], 0.4, 0, dst=hair_region)
+    color_fill = np.full(source_image.shape, np.mean(color_image, axis=(0, 1)), dtype=np.uint8)
+    for region in regions:
+        hair_region = result[region]
+        cv2.addWeighted(hair_region, 0.7, color_fill[region], 0.3, 0, dst=hair_region)
+    return result
+
+
+class TestLocalHairBlend:
+    """Fused hair blend against the original two-pass style + color blend"""
+
+    @pytest.fixture
+    def model(self):
+        return LocalHairModel()
+
+    @pytest.fixture
+    def images(self):
+        rng = np.random.default_rng(0)
+        source = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+        style = rng.integers(0, 256, (200, 200, 3), dtype=np.uint8)
+        color = rng.integers(0, 256, (50, 50, 3), dtype=np.uint8)
+        return source, style, color
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("faces", [
+        np.array([[100, 80, 60, 60]]),
+        np.array([[20, 60, 50, 50], [200, 100, 60, 60]]),
+        # Overlapping hair regions
+        np.array([[100, 80, 60, 60], [130, 90, 60, 60]]),
+    ])
+    def test_matches_two_pass_blend(self, model, images, faces):
+        """Test the fused blend stays within 1 of the two-pass output"""
+        source, style, color = images
+        expected = _two_pass_hair_transfer(source, style, color, faces)
+
+        with patch.object(model, '_detect_faces_tracked', return_value=faces):
+            result = model._simple_hair_transfer(source, style, color)
+
+        diff = np.abs(result.astype(np.int16) - expected.astype(np.int16))
+        assert diff.max() <= 1
+
+    @pytest.mark.unit
+    def test_leaves_source_untouched(self, model, images):
+        """Test the caller's frame is not modified in place"""
+        source, style, color = images
+        original = source.copy()
+
+        with patch.object(model, '_detect_faces_tracked', return_value=np.array([[100, 80, 60, 60]])):
+            model._simple_hair_transfer(source, style, color)
+
+        assert np.array_equal(source, original)
+
+
+class TestImageCache:
+    """Per-image caches shared by concurrent sessions"""
+
+    @pytest.mark.unit
+    def test_alternating_sessions_hit(self):
+        """Test two sessions' images stay cached while used alternately"""
+        cache = _ImageCache(maxsize=4)
+        style_a = np.zeros((4, 4, 3), np.uint8)
+        style_b = np.ones((4, 4, 3), np.uint8)
+        calls = []
+
+        for _ in range(3):
+            for style in (style_a, style_b):
+                cache.get((style,), (8, 8, 3), lambda: calls.append(1) or object())
+
+        assert len(calls) == 2
+
+    @pytest.mark.unit
+    def test_evicts_least_recently_used(self):
+        """Test the oldest entry is dropped once maxsize is exceeded"""
+        cache = _ImageCache(maxsize=2)
+        images = [np.full((2, 2), i, np.uint8) for i in range(3)]
+        for image in images:
+            cache.get((image,), None, lambda: "value")
+        cache.get((images[2],), None, lambda: "value")
+
+        rebuilt = []
+        cache.get((images[0],), None, lambda: rebuilt.append(0) or "value")
+        cache.get((images[2],), None, lambda: rebuilt.append(2) or "value")
+        assert rebuilt == [0]
+
+    @pytest.mark.unit
+    def test_style_resized_per_session(self):
+        """Test each session's resized style is reused across interleaved frames"""
+        model = LocalHairModel()
+        style_a = np.zeros((50, 50, 3), np.uint8)
+        style_b = np.full((50, 50, 3), 255, np.uint8)
+        shape = (120, 160, 3)
+
+        first_a = model._get_style_resized(style_a, shape)
+        first_b = model._get_style_resized(style_b, shape)
+
+        assert model._get_style_resized(style_a, shape) is first_a
+        assert model._get_style_resized(style_b, shape) is first_b
+        assert first_a.shape == shape
+
+
+class TestReplicateKeyframes:
+    """API calls on key frames only, optical-flow warp in between"""
+
+    @pytest.fixture
+    def model(self):
+        model = ReplicateHairModel()
+        model.model_loaded = True
+        model.keyframe_interval = 3
+        model.use_opencl = False
+        return model
+
+    @pytest.fixture
+    def frames(self):
+        rng = np.random.default_rng(0)
+        base = cv2.GaussianBlur(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8), (9, 9), 0)
+        # Small horizontal shift between consecutive frames
+        return [np.roll(base, shift, axis=1) for shift in range(5)]
+
+    @pytest.fixture
+    def api_result(self, model):
+        # apply_hairstyle imports the optional replicate package before calling the API
+        pytest.importorskip("replicate")
+        return model._image_to_base64(np.full((120, 160, 3), 200, np.uint8))
+
+    @pytest.mark.unit
+    async def test_api_called_on_key_frames_only(self, model, frames, api_result):
+        """Test the API runs once per keyframe_interval frames of a stream"""
+        style = np.zeros((50, 50, 3), np.uint8)
+
+        with patch.object(model, '_run_replicate_model', AsyncMock(return_value=api_result)) as run:
+            results = [
+                await model.apply_hairstyle(frame, style, stream_id="stream")
+                for frame in frames
+            ]
+
+        assert run.await_count == 2
+        assert all(result.shape == frames[0].shape for result in results)
+
+    @pytest.mark.unit
+    async def test_style_change_forces_key_frame(self, model, frames, api_result):
+        """Test a new style image bypasses the stored key frame"""
+        with patch.object(model, '_run_replicate_model', AsyncMock(return_value=api_result)) as run:
+            await model.apply_hairstyle(frames[0], np.zeros((50, 50, 3), np.uint8), stream_id="stream")
+            await model.apply_hairstyle(frames[1], np.ones((50, 50, 3), np.uint8), stream_id="stream")
+
+        assert run.await_count == 2
+
+    @pytest.mark.unit
+    async def test_streams_keep_separate_key_frames(self, model, frames, api_result):
+        """Test each stream needs its own key frame"""
+        style = np.zeros((50, 50, 3), np.uint8)
+
+        with patch.object(model, '_run_replicate_model', AsyncMock(return_value=api_result)) as run:
+            await model.apply_hairstyle(frames[0], style, stream_id="a")
+            await model.apply_hairstyle(frames[0], style, stream_id="b")
+            await model.apply_hairstyle(frames[1], style, stream_id="a")
+            await model.apply_hairstyle(frames[1], style, stream_id="b")
+
+        assert run.await_count == 2
+
+    @pytest.mark.unit
+    def test_warp_follows_motion(self, model, frames):
+        """Test the warped key result tracks the shift of the source frame"""
+        key_result = frames[0]
+        key_gray = model._flow_gray(frames[0])
+
+        warped = model._warp_keyframe(key_gray, key_result, frames[2])
+
+        # Compare away from the borders, where the roll wraps around
+        inner = (slice(10, -10), slice(10, -10))
+        warped_error = np.abs(warped[inner].astype(np.int16) - frames[2][inner]).mean()
+        unwarped_error = np.abs(key_result[inner].astype(np.int16) - frames[2][inner]).mean()
+        assert warped_error < unwarped_error / 2
+
+    @pytest.mark.unit
+    def test_warp_identical_frame_is_identity(self, model, frames):
+        """Test warping onto the key frame itself returns the key result"""
+        key_result = np.full(frames[0].shape, 90, np.uint8)
+        key_result[40:80, 60:100] = 220
+
+        warped = model._warp_keyframe(model._flow_gray(frames[0]), key_result, frames[0])
+
+        diff = np.abs(warped.astype(np.int16) - key_result)
+        assert np.mean(diff) < 1
+
+
+class TestFaceMotionGating:
+    """Face detection skipped while a stream's frame barely changes"""
+
+    @pytest.fixture
+    def model(self):
+        model = LocalHairModel()
+        model.face_motion_threshold = 4.0
+        return model
+
+    @pytest.fixture
+    def frame(self):
+        rng = np.random.default_rng(0)
+        return rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+
+    @pytest.mark.unit
+    def test_static_frames_reuse_detection(self, model, frame):
+        """Test an unchanged frame reuses the stream's last face boxes"""
+        faces = np.array([[100, 80, 60, 60]])
+
+        with patch.object(model, '_detect_faces', return_value=faces) as detect:
+            first = model._detect_faces_tracked(frame, "stream")
+            second = model._detect_faces_tracked(frame.copy(), "stream")
+
+        assert detect.call_count == 1
+        assert second is first
+
+    @pytest.mark.unit
+    def test_motion_triggers_detection(self, model, frame):
+        """Test a frame that changed past the threshold is detected again"""
+        with patch.object(model, '_detect_faces', return_value=np.empty((0, 4))) as detect:
+            model._detect_faces_tracked(frame, "stream")
+            model._detect_faces_tracked(255 - frame, "stream")
+
+        assert detect.call_count == 2
+
+    @pytest.mark.unit
+    def test_tracks_are_per_stream(self, model, frame):
+        """Test one stream's detection is not reused by another"""
+        with patch.object(model, '_detect_faces', return_value=np.empty((0, 4))) as detect:
+            model._detect_faces_tracked(frame, "a")
+            model._detect_faces_tracked(frame, "b")
+
+        assert detect.call_count == 2
+
+    @pytest.mark.unit
+    def test_resolution_change_triggers_detection(self, model, frame):
+        """Test boxes are not reused across frame sizes"""
+        with patch.object(model, '_detect_faces', return_value=np.empty((0, 4))) as detect:
+            model._detect_faces_tracked(frame, "stream")
+            model._detect_faces_tracked(cv2.resize(frame, (160, 120)), "stream")
+
+        assert detect.call_count == 2
+
+    @pytest.mark.unit
+    def test_disabled_without_stream_or_threshold(self, model, frame):
+        """Test every frame is detected without a stream ID or with gating off"""
+        with patch.object(model, '_detect_faces', return_value=np.empty((0, 4))) as detect:
+            model._detect_faces_tracked(frame, None)
+            model._detect_faces_tracked(frame, None)
+            model.face_motion_threshold = 0
+            model._detect_faces_tracked(frame, "stream")
+            model._detect_faces_tracked(frame, "stream")
+
+        assert detect.call_count == 4
+        assert not model._face_tracks
+
+    @pytest.mark.unit
+    def test_release_stream_drops_track(self, model, frame):
+        """Test releasing a stream forgets its last detection"""
+        with patch.object(model, '_detect_faces', return_value=np.empty((0, 4))) as detect:
+            model._detect_faces_tracked(frame, "stream")
+            model.release_stream("stream")
+            model._detect_faces_tracked(frame, "stream")
+
+        assert detect.call_count == 2
+
+    @pytest.mark.unit
+    def test_release_during_detection_is_not_undone(self, model, frame):
+        """Test a frame still being detected doesn't restore a released track"""
+        def detect_and_release(image):
+            model.release_stream("stream")
+            return np.empty((0, 4))
+
+        with patch.object(model, '_detect_faces', side_effect=detect_and_release):
+            model._detect_faces_tracked(frame, "stream")
+
+        assert "stream" not in model._face_tracks
+
+    @pytest.mark.unit
+    def test_concurrent_streams_past_capacity(self, model):
+        """Test concurrent sessions evicting each other keep the table consistent"""
+        model._max_face_tracks = 4
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (48, 64, 3), dtype=np.uint8) for _ in range(4)]
+        errors = []
+
+        def session(n):
+            try:
+                for i in range(200):
+                    stream_id = f"stream-{(n * 3 + i) % 12}"
+                    model._detect_faces_tracked(frames[i % len(frames)], stream_id)
+                    if i % 25 == 0:
+                        model.release_stream(stream_id)
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(model, '_detect_faces', return_value=np.empty((0, 4))):
+            threads = [threading.Thread(target=session, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert not errors
+        assert len(model._face_tracks) <= 4
@@ -190,4 +190,96 @@ class TestVideoService:
             
             assert upload_id in result_path
             assert result_path.endswith('.mp4')
-            mock_file_handle.write.assert_called_once_with(b"fake video content")
\ No newline at end of file
+            mock_file_handle.write.assert_called_once_with(b"fake video content")
+
+
+class _FakeCapture:
+    """VideoCapture stand-in recording how frames were read, grabbed or seeked"""
+    
+    def __init__(self, total_frames, seekable=True):
+        self.total_frames = total_frames
+        self.seekable = seekable
+        self.position = 0
+        self.reads = []
+        self.grabs = 0
+        self.seeks = []
+    
+    def get(self, prop):
+        return self.total_frames if prop == cv2.CAP_PROP_FRAME_COUNT else 0
+    
+    def set(self, prop, value):
+        if not self.seekable:
+            return False
+        self.seeks.append(value)
+        self.position = value
+        return True
+    
+    def grab(self):
+        if self.position >= self.total_frames:
+            return False
+        self.grabs += 1
+        self.position += 1
+        return True
+    
+    def read(self):
+        if self.position >= self.total_frames:
+            return False, None
+        self.reads.append(self.position)
+        frame = np.full((8, 8, 3), self.position, dtype=np.uint8)
+        self.position += 1
+        return True, frame
+    
+    def release(self):
+        pass
+
+
+class TestIterFrames:
+    """Frame sampling in iter_frames: grab() for short gaps, seeking for long ones"""
+    
+    def _sample(self, cap, sampling_rate, **kwargs):
+        with patch.object(video_service, '_open_video_capture', return_value=cap):
+            return [int(frame[0, 0, 0]) for frame in video_service.iter_frames("video.mp4", sampling_rate, **kwargs)]
+    
+    @pytest.mark.unit
+    def test_short_step_grabs_skipped_frames(self):
+        """Test skipped frames are grabbed, not decoded to BGR, below the seek step"""
+        cap = _FakeCapture(10)
+        
+        frames = self._sample(cap, 0.5)
+        
+        assert frames == [0, 2, 4, 6, 8]
+        assert cap.reads == frames
+        assert cap.grabs == 5
+        assert cap.seeks == []
+    
+    @pytest.mark.unit
+    def test_long_step_seeks(self):
+        """Test large steps seek straight to the next sampled frame"""
+        cap = _FakeCapture(100)
+        
+        frames = self._sample(cap, 1 / 20)
+        
+        assert frames == [0, 20, 40, 60, 80]
+        assert cap.grabs == 0
+        assert cap.seeks == [20, 40, 60, 80]
+    
+    @pytest.mark.unit
+    def test_unseekable_container_falls_back_to_grab(self):
+        """Test a failed seek decodes through the gap with grab() instead"""
+        cap = _FakeCapture(50, seekable=False)
+        
+        frames = self._sample(cap, 1 / 20)
+        
+        assert frames == [0, 20, 40]
+        assert cap.grabs == 47
+    
+    @pytest.mark.unit
+    def test_target_size_resizes_on_reader(self):
+        """Test frames come out at target_size"""
+        cap = _FakeCapture(4)
+        
+        with patch.object(video_service, '_open_video_capture', return_value=cap):
+            frames = list(video_service.iter_frames("video.mp4", 1.0, target_size=(4, 2)))
+        
+        assert len(frames) == 4
+        assert all(frame.shape == (2, 4, 3) for frame in frames)
@@ -2,6 +2,7 @@ import pytest
 import asyncio
 import json
 import base64
+import cv2
 import numpy as np
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -213,6 +214,47 @@ class TestRealtimeProcessor:
         
         assert isinstance(score, float)
         assert 0.0 <= score <= 1.0
+    
+    @pytest.mark.unit
+    def test_limit_frame_width_reuses_plan(self):
+        """Test a session's resize target and output buffer are reused across frames"""
+        processor = RealtimeProcessor(ConnectionManager())
+        processor.max_frame_width = 320
+        metadata = {}
+        frames = [np.full((480, 640, 3), i, dtype=np.uint8) for i in range(3)]
+        
+        first = processor._limit_frame_width(frames[0], metadata)
+        plan = metadata["frame_plan"]
+        second = processor._limit_frame_width(frames[1], metadata)
+        
+        assert metadata["frame_plan"] is plan
+        assert second.shape == (240, 320, 3)
+        assert np.shares_memory(first, second)
+        assert np.all(second == 1)
+    
+    @pytest.mark.unit
+    def test_limit_frame_width_replans_on_resolution_change(self):
+        """Test a new input resolution gets a new target size and buffer"""
+        processor = RealtimeProcessor(ConnectionManager())
+        processor.max_frame_width = 320
+        metadata = {}
+        
+        first = processor._limit_frame_width(np.zeros((480, 640, 3), np.uint8), metadata)
+        second = processor._limit_frame_width(np.zeros((720, 1280, 3), np.uint8), metadata)
+        
+        assert first.shape == (240, 320, 3)
+        assert second.shape == (180, 320, 3)
+        assert metadata["frame_plan"][0] == (720, 1280, 3)
+    
+    @pytest.mark.unit
+    def test_limit_frame_width_passes_narrow_frames(self):
+        """Test frames within the maximum width are returned as-is"""
+        processor = RealtimeProcessor(ConnectionManager())
+        processor.max_frame_width = 320
+        frame = np.zeros((120, 160, 3), np.uint8)
+        
+        assert processor._limit_frame_width(frame, {}) is frame
+        assert processor._limit_frame_width(frame) is frame
 
 class TestWebSocketService:
     """Unit tests for WebSocketService"""
@@ -56,6 +56,10 @@ class MLSettings(BaseSettings):
     
     # Performance Optimization
     ENABLE_QUANTIZATION: bool = os.getenv("ENABLE_QUANTIZATION", "false").lower() == "true"
+    ENABLE_CHANNELS_LAST: bool = os.getenv("ENABLE_CHANNELS_LAST", "true").lower() == "true"
+    ENABLE_TORCH_COMPILE: bool = os.getenv("ENABLE_TORCH_COMPILE", "false").lower() == "true"
+    TORCH_COMPILE_MODE: str = os.getenv("TORCH_COMPILE_MODE", "max-autotune-no-cudagraphs")
+    INFERENCE_PRECISION: Literal["auto", "fp32", "fp16", "bf16"] = os.getenv("INFERENCE_PRECISION", "auto")
     ENABLE_ONNX: bool = os.getenv("ENABLE_ONNX", "false").lower() == "true"
     ONNX_MODEL_PATH: Optional[str] = os.getenv("ONNX_MODEL_PATH", None)
     
@@ -66,6 +70,8 @@ class MLSettings(BaseSettings):
     # Batch Processing Configuration
     ENABLE_BATCH_PROCESSING: bool = os.getenv("ENABLE_BATCH_PROCESSING", "true").lower() == "true"
     MAX_BATCH_SIZE: int = int(os.getenv("MAX_BATCH_SIZE", "8"))
+    AUTO_BATCH_SIZE: bool = os.getenv("AUTO_BATCH_SIZE", "false").lower() == "true"  # Probe free GPU memory at load and override MAX_BATCH_SIZE
+    BATCH_MAX_WAIT_MS: float = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))  # How long a request waits for its batch to fill
     
     # Memory Management
     AUTO_CLEANUP_MEMORY: bool = os.getenv("AUTO_CLEANUP_MEMORY", "true").lower() == "true"
@@ -140,6 +146,10 @@ class MLSettings(BaseSettings):
         if self.DEVICE not in ["auto", "cuda", "cpu"]:
             raise ValueError(f"DEVICE must be 'auto', 'cuda', or 'cpu', got {self.DEVICE}")
         
+        # Validate inference precision
+        if self.INFERENCE_PRECISION not in ["auto", "fp32", "fp16", "bf16"]:
+            raise ValueError(f"INFERENCE_PRECISION must be 'auto', 'fp32', 'fp16', or 'bf16', got {self.INFERENCE_PRECISION}")
+        
         # Validate fallback API configuration
         if self.ENABLE_FALLBACK_API:
             if not self.FALLBACK_API_URL:
@@ -226,6 +236,7 @@ class MLSettings(BaseSettings):
             "cache_size": self.PREDICTION_CACHE_SIZE,
             "batch_processing_enabled": self.ENABLE_BATCH_PROCESSING,
             "max_batch_size": self.MAX_BATCH_SIZE,
+            "auto_batch_size": self.AUTO_BATCH_SIZE,
         }
 
 
@@ -5,9 +5,6 @@ This module contains the machine learning components for skin condition detectio
 and analysis, including model management, preprocessing, and post-processing.
 """
 
-from app.ml.model_manager import ModelManager
-from app.ml.preprocessor import ImagePreprocessor
-from app.ml.postprocessor import PostProcessor
 from app.ml.models import (
     ModelConfig,
     SkinType,
@@ -35,6 +32,27 @@ from app.ml.logging_utils import (
     PerformanceTracker,
 )
 
+# The model manager, preprocessor and post-processor pull in torch,
+# torchvision and OpenCV. They are resolved on first attribute access
+# (PEP 562), so importing a light submodule such as app.ml.models or
+# app.ml.exceptions doesn't pay the multi-second torch import.
+_LAZY_IMPORTS = {
+    "ModelManager": "app.ml.model_manager",
+    "ImagePreprocessor": "app.ml.preprocessor",
+    "PostProcessor": "app.ml.postprocessor",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "ModelManager",
     "ImagePreprocessor",
@@ -4,16 +4,19 @@ Model Manager for ML model lifecycle and inference.
 Handles model loading, device management, and inference orchestration.
 """
 
+import contextlib
 import logging
+import os
+import threading
 import time
 import gc
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import torch
 import torch.nn.functional as F
 import numpy as np
 
-from app.ml.performance import PerformanceOptimizer, MemoryManager
+from app.ml.performance import PerformanceOptimizer, MemoryManager, DynamicBatcher
 from app.ml.exceptions import (
     ModelError,
     ModelNotFoundError,
@@ -26,6 +29,10 @@ from app.ml.logging_utils import MLLogger, log_operation
 
 logger = logging.getLogger(__name__)
 
+# torch.compile modes that replay CUDA graphs, whose static buffers are not
+# safe to share between concurrent forward passes
+_CUDA_GRAPH_COMPILE_MODES = ("reduce-overhead", "max-autotune")
+
 
 class ModelManager:
     """
@@ -51,7 +58,16 @@ class ModelManager:
         enable_quantization: bool = False,
         enable_caching: bool = True,
         cache_size: int = 128,
-        batch_size: int = 8
+        batch_size: int = 8,
+        channels_last: bool = True,
+        input_size: Tuple[int, int] = (224, 224),
+        compile_model: bool = False,
+        compile_mode: str = "max-autotune-no-cudagraphs",
+        onnx_model_path: Optional[str] = None,
+        dynamic_batch_size: int = 1,
+        max_batch_wait_ms: float = 5.0,
+        precision: str = "fp32",
+        auto_batch_size: bool = False
     ):
         """
         Initialize model manager.
@@ -64,16 +80,54 @@ class ModelManager:
             enable_caching: Enable prediction caching
             cache_size: Maximum cache size for predictions
             batch_size: Batch size for batch processing
+            channels_last: Use channels-last (NHWC) memory format on GPU
+            input_size: Model input size (H, W), used for GPU warm-up
+            compile_model: Compile the model with torch.compile after loading
+            compile_mode: torch.compile mode. The CUDA graph modes ("reduce-overhead",
+                "max-autotune") serialize forward passes across threads
+            onnx_model_path: Exported ONNX model; when set and onnxruntime is
+                installed, inference runs through ONNX Runtime instead of PyTorch
+            dynamic_batch_size: When > 1, concurrent predict() calls are grouped
+                into batches of up to this size
+            max_batch_wait_ms: Maximum time a request waits for its batch to fill
+            precision: CUDA inference precision - "fp32", "fp16", "bf16", or
+                "auto" (fp16 autocast on Volta and newer, fp32 otherwise)
+            auto_batch_size: On CUDA, replace batch_size after loading with the
+                largest power of two that fits in free GPU memory
         """
         self.model_path = Path(model_path)
         self.device_preference = device
         self.device = None
         self.model = None
         self._is_loaded = False
+        # Serializes load/unload, since predict runs on worker threads; an
+        # RLock so the OOM fallback can unload and reload in one critical section
+        self._model_lock = threading.RLock()
         self.confidence_threshold = confidence_threshold
         self.model_version = "v1.0"
         self._load_attempts = 0
         self._max_load_attempts = 2
+        self.channels_last = channels_last
+        self.input_size = tuple(input_size)
+        self._use_channels_last = False
+        self.compile_model = compile_model
+        self.compile_mode = compile_mode
+        self._is_compiled = False
+        self._forward_lock = None
+        self.onnx_model_path = Path(onnx_model_path) if onnx_model_path else None
+        self._onnx_session = None
+        self._onnx_input_name = None
+        self._onnx_static_batch = False
+        self.precision = precision
+        self._autocast_dtype = None
+        self.auto_batch_size = auto_batch_size
+        self._batcher = None
+        if dynamic_batch_size > 1:
+            self._batcher = DynamicBatcher(
+                self.predict_batch,
+                max_batch_size=dynamic_batch_size,
+                max_wait_ms=max_batch_wait_ms
+            )
         
         # Initialize structured logger
         self._logger = MLLogger("ModelManager")
@@ -121,12 +175,14 @@ class ModelManager:
             
             # Check for CUDA availability
             if torch.cuda.is_available():
-                device_name = torch.cuda.get_device_name(0)
+                device_index = self._select_cuda_device()
+                device_name = torch.cuda.get_device_name(device_index)
                 self._logger.log_operation_complete(
                     "device_detection",
                     0.0,
                     device="cuda",
-                    gpu_name=device_name
+                    gpu_name=device_name,
+                    gpu_index=device_index
                 )
                 return "cuda"
             
@@ -145,6 +201,69 @@ class ModelManager:
                 original_exception=e
             )
     
+    def _select_cuda_device(self) -> int:
+        """
+        Select the CUDA device with the most free memory.
+        
+        On multi-GPU hosts, each worker process then lands on the least loaded
+        GPU instead of every process piling onto device 0. A LOCAL_RANK set by
+        the launcher pins the device instead. Free memory comes from NVML
+        (nvidia-ml-py), so no CUDA context is created on the GPUs that are
+        not chosen; without NVML, device 0 is used. Devices hidden by
+        CUDA_VISIBLE_DEVICES are never considered. The chosen GPU becomes the
+        current device, so plain "cuda" tensors and memory queries use it.
+        
+        Returns:
+            Index of the selected CUDA device
+        """
+        device_count = torch.cuda.device_count()
+        if device_count <= 1:
+            return 0
+        
+        local_rank = os.environ.get("LOCAL_RANK")
+        if local_rank is not None:
+            device_index = int(local_rank) % device_count
+        else:
+            free_memory = self._query_free_gpu_memory(device_count)
+            if free_memory is None:
+                return 0
+            device_index = max(range(device_count), key=free_memory.__getitem__)
+        
+        torch.cuda.set_device(device_index)
+        return device_index
+    
+    def _query_free_gpu_memory(self, device_count: int) -> Optional[List[int]]:
+        """
+        Read free memory of each visible CUDA device through NVML.
+        
+        Devices are matched by UUID, so the result follows CUDA's device
+        order and CUDA_VISIBLE_DEVICES. Unlike torch.cuda.mem_get_info, this
+        does not create a CUDA context on every GPU.
+        
+        Returns:
+            Free bytes per CUDA device index, or None if NVML is unavailable
+        """
+        try:
+            import pynvml
+        except ImportError:
+            self._logger.log_warning("nvidia-ml-py not installed, using CUDA device 0")
+            return None
+        
+        try:
+            pynvml.nvmlInit()
+            try:
+                free_memory = []
+                for i in range(device_count):
+                    uuid = str(torch.cuda.get_device_properties(i).uuid)
+                    handle = pynvml.nvmlDeviceGetHandleByUUID(f"GPU-{uuid}")
+                    free_memory.append(pynvml.nvmlDeviceGetMemoryInfo(handle).free)
+                return free_memory
+            finally:
+                pynvml.nvmlShutdown()
+        except Exception as e:
+            self._logger.log_warning(f"NVML query failed ({e}), using CUDA device 0")
+            return None
+    
     def load_model(self) -> None:
         """
         Load model into memory with device-aware loading.
@@ -157,10 +276,19 @@ class ModelManager:
             ModelLoadError: If model loading fails after retries
             OutOfMemoryError: If system runs out of memory
         """
+        with self._model_lock:
+            self._load_model()
+    
+    def _load_model(self) -> None:
+        """Body of load_model; the caller holds _model_lock."""
         if self._is_loaded:
             self._logger.log_warning("Model already loaded, skipping load")
             return
         
+        # Prefer an exported ONNX model when one is configured
+        if self.onnx_model_path is not None and self._load_onnx_session():
+            return
+        
         # Check if model file exists
         if not self.model_path.exists():
             raise ModelNotFoundError(
@@ -198,18 +326,46 @@ class ModelManager:
             # Move model to device if it's a nn.Module
             if isinstance(self.model, torch.nn.Module):
                 self.model = self.model.to(self.device)
+                
+                if self.device == "cuda":
+                    # Input size is fixed, so let cuDNN benchmark and cache the
+                    # fastest convolution algorithms
+                    torch.backends.cudnn.benchmark = True
+                    
+                    # Allow TF32 tensor cores for FP32 matmuls/convolutions
+                    # (Ampere+); the precision loss is irrelevant for classification
+                    torch.set_float32_matmul_precision("high")
+                    
+                    self._autocast_dtype = self._resolve_autocast_dtype()
+                    
+                    # Channels-last lets cuDNN use tensor-core friendly NHWC kernels
+                    # without layout transposes around every convolution
+                    if self.channels_last:
+                        self.model = self.model.to(memory_format=torch.channels_last)
+                        self._use_channels_last = True
             
             # Apply performance optimizations
             if isinstance(self.model, torch.nn.Module):
                 self.model = self.performance_optimizer.optimize_model(self.model)
+                
+                if self.compile_model:
+                    self._compile()
+            
+            # Pay CUDA context setup, cuDNN autotuning and graph compilation
+            # now, not on the first request
+            if (self.device == "cuda" or self._is_compiled) and isinstance(self.model, torch.nn.Module):
+                self._warmup()
+            
+            if self.auto_batch_size and self.device == "cuda" and isinstance(self.model, torch.nn.Module):
+                self._tune_batch_size()
             
             load_time = time.time() - start_time
             self._is_loaded = True
             
             # Log memory usage if on GPU
             if self.device == "cuda":
-                memory_allocated = torch.cuda.memory_allocated(0) / (1024 ** 2)
-                memory_reserved = torch.cuda.memory_reserved(0) / (1024 ** 2)
+                memory_allocated = torch.cuda.memory_allocated() / (1024 ** 2)
+                memory_reserved = torch.cuda.memory_reserved() / (1024 ** 2)
                 self._logger.log_memory_usage(self.device, memory_allocated, memory_reserved)
             
             self._logger.log_operation_complete(
@@ -224,7 +380,7 @@ class ModelManager:
             
             # Log OOM error
             if self.device == "cuda":
-                memory_allocated = torch.cuda.memory_allocated(0) / (1024 ** 2) if torch.cuda.is_available() else 0
+                memory_allocated = torch.cuda.memory_allocated() / (1024 ** 2) if torch.cuda.is_available() else 0
                 self._logger.log_warning(
                     "GPU out of memory during model loading",
                     memory_allocated_mb=memory_allocated,
@@ -283,6 +439,232 @@ class ModelManager:
                 original_exception=e
             )
     
+    def _load_onnx_session(self) -> bool:
+        """
+        Create an ONNX Runtime session for the exported model.
+        
+        Execution providers are tried fastest first (TensorRT, CUDA, CPU),
+        limited to the ones this onnxruntime build provides. TensorRT engines
+        are built for the fixed serving input shape and cached next to the
+        ONNX file, so the multi-minute engine build happens once per model and
+        GPU rather than on every start; a warm-up run triggers it at load time.
+        
+        Returns:
+            True if the session is ready, False to fall back to PyTorch
+        """
+        if not self.onnx_model_path.exists():
+            self._logger.log_warning(
+                "ONNX model not found, using PyTorch model",
+                onnx_model_path=str(self.onnx_model_path)
+            )
+            return False
+        
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            self._logger.log_warning("onnxruntime not installed, using PyTorch model")
+            return False
+        
+        start_time = time.time()
+        try:
+            available = set(ort.get_available_providers())
+            preferred = ["CPUExecutionProvider"]
+            if self.device_preference != "cpu":
+                preferred = ["TensorrtExecutionProvider", "CUDAExecutionProvider"] + preferred
+            providers = [p for p in preferred if p in available]
+            
+            if "TensorrtExecutionProvider" in providers:
+                trt_cache_dir = self.onnx_model_path.parent / "trt_cache"
+                trt_cache_dir.mkdir(parents=True, exist_ok=True)
+                trt_options = {
+                    "trt_engine_cache_enable": True,
+                    "trt_engine_cache_path": str(trt_cache_dir),
+                    "trt_fp16_enable": self.precision in ("auto", "fp16"),
+                }
+                providers = [
+                    ("TensorrtExecutionProvider", trt_options) if p == "TensorrtExecutionProvider" else p
+                    for p in providers
+                ]
+            
+            session_options = ort.SessionOptions()
+            session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            
+            self._onnx_session = ort.InferenceSession(
+                str(self.onnx_model_path),
+                sess_options=session_options,
+                providers=providers
+            )
+            session_input = self._onnx_session.get_inputs()[0]
+            self._onnx_input_name = session_input.name
+            self._onnx_static_batch = isinstance(session_input.shape[0], int)
+            
+            active_providers = self._onnx_session.get_providers()
+            self.device = "cpu" if active_providers[0] == "CPUExecutionProvider" else "cuda"
+            
+            if self.device == "cuda":
+                # Builds (or loads cached) TensorRT engines and CUDA kernels now
+                dummy_input = np.zeros((1, 3, *self.input_size), dtype=np.float32)
+                self._onnx_session.run(None, {self._onnx_input_name: dummy_input})
+            
+            self._is_loaded = True
+            
+            self._logger.log_operation_complete(
+                "onnx_model_loading",
+                time.time() - start_time,
+                device=self.device,
+                providers=active_providers
+            )
+            return True
+            
+        except Exception as e:
+            self._onnx_session = None
+            self._logger.log_warning("ONNX Runtime session creation failed, using PyTorch model", error=str(e))
+            return False
+    
+    def _run_onnx(self, image_tensor: torch.Tensor) -> Any:
+        """
+        Run the ONNX Runtime session and return outputs as CPU tensors.
+        
+        Args:
+            image_tensor: Input tensor with shape (N, 3, H, W)
+            
+        Returns:
+            Tensor, or tuple of tensors for multi-head models, in the same
+            layout the PyTorch model would return
+        """
+        inputs = image_tensor.detach().cpu().contiguous().numpy()
+        
+        # Models exported with a fixed batch of 1 are run one image at a time
+        if self._onnx_static_batch and inputs.shape[0] > 1:
+            chunks = [self._onnx_session.run(None, {self._onnx_input_name: inputs[i:i + 1]})
+                      for i in range(inputs.shape[0])]
+            outputs = [np.concatenate(parts, axis=0) for parts in zip(*chunks)]
+        else:
+            outputs = self._onnx_session.run(None, {self._onnx_input_name: inputs})
+        
+        if len(outputs) == 1:
+            return torch.from_numpy(outputs[0])
+        return tuple(torch.from_numpy(output) for output in outputs[:2])
+    
+    def _compile(self) -> None:
+        """
+        Wrap the model with torch.compile.
+        
+        Inductor fuses pointwise ops into fewer kernels. Modes that replay CUDA
+        graphs reuse static input/output buffers, so on CUDA their forward
+        passes are serialized; the default mode skips CUDA graphs and stays
+        concurrent. Compilation itself happens lazily on the first forward,
+        i.e. during warm-up.
+        """
+        if not hasattr(torch, "compile"):
+            self._logger.log_warning("torch.compile not available, skipping model compilation")
+            return
+        
+        try:
+            self.model = torch.compile(self.model, mode=self.compile_mode)
+            self._is_compiled = True
+            if self.device == "cuda" and self.compile_mode in _CUDA_GRAPH_COMPILE_MODES:
+                self._forward_lock = threading.Lock()
+        except Exception as e:
+            # Compilation is an optimization only; keep the eager model
+            self._logger.log_warning("Model compilation failed", error=str(e))
+    
+    def _resolve_autocast_dtype(self) -> Optional[torch.dtype]:
+        """
+        Autocast dtype for CUDA inference, or None to run in FP32.
+        
+        Half precision runs convolutions on tensor cores (Volta+) at roughly
+        twice the FP32 throughput with half the activation memory; softmax
+        and sigmoid scores are computed in FP32 afterwards.
+        """
+        precision = self.precision
+        if precision == "auto":
+            precision = "fp16" if torch.cuda.get_device_capability()[0] >= 7 else "fp32"
+        
+        if precision == "fp16":
+            return torch.float16
+        if precision == "bf16":
+            if torch.cuda.is_bf16_supported():
+                return torch.bfloat16
+            self._logger.log_warning("BF16 not supported on this GPU, running inference in FP32")
+        return None
+    
+    def _inference_context(self) -> contextlib.ExitStack:
+        """inference_mode, plus autocast when reduced precision is enabled
+        and the forward lock when a CUDA graph compile mode is in use"""
+        stack = contextlib.ExitStack()
+        if self._forward_lock is not None:
+            stack.enter_context(self._forward_lock)
+        stack.enter_context(torch.inference_mode())
+        if self._autocast_dtype is not None:
+            stack.enter_context(torch.autocast(device_type="cuda", dtype=self._autocast_dtype))
+        return stack
+    
+    def _warmup(self, iterations: int = 2) -> None:
+        """
+        Run dummy forward passes at the serving input size.
+        
+        The first CUDA inferences pay for lazy kernel loading, allocator growth
+        and cudnn.benchmark algorithm search. Running them here keeps that cost
+        out of user-facing latency.
+        
+        Args:
+            iterations: Number of warm-up forward passes
+        """
+        start_time = time.time()
+        try:
+            dummy_input = self._to_device(torch.zeros(1, 3, *self.input_size))
+            with self._inference_context():
+                for _ in range(iterations):
+                    self.model(dummy_input)
+            if self.device == "cuda":
+                torch.cuda.synchronize()
+            
+            self._logger.log_operation_complete(
+                "model_warmup",
+                time.time() - start_time,
+                device=self.device,
+                iterations=iterations
+            )
+        except Exception as e:
+            # Warm-up is an optimization only; never fail model loading over it
+            self._logger.log_warning("Model warm-up failed", error=str(e))
+    
+    def _tune_batch_size(self) -> None:
+        """
+        Size batches from the GPU memory actually free after loading.
+        
+        Probes with the serving layout and precision, then applies the result
+        to batch processing and caps the dynamic batcher at the same size.
+        """
+        batch_processor = self.performance_optimizer.batch_processor
+        batch_size = batch_processor.get_optimal_batch_size(
+            self.model,
+            self.input_size,
+            device=self.device,
+            prepare_input=self._to_device,
+            inference_context=self._inference_context
+        )
+        batch_processor.batch_size = batch_size
+        if self._batcher is not None and self._batcher.max_batch_size > batch_size:
+            self._batcher.max_batch_size = batch_size
+        self._logger.log_metric("auto_batch_size", batch_size)
+    
+    def _acquire_model(self) -> Any:
+        """
+        Load the model if needed and return it.
+        
+        Both steps happen under _model_lock, so concurrent first requests load
+        the model once and a forward pass never sees the empty model left
+        between an unload and the reload. The returned reference stays valid
+        for the caller even if the model is swapped afterwards.
+        """
+        with self._model_lock:
+            if not self._is_loaded:
+                self._logger.log_operation_start("lazy_loading")
+                self._load_model()
+            return self.model
+    
     def predict(self, image_tensor: torch.Tensor, use_cache: bool = True) -> Dict[str, Any]:
         """
         Run inference on preprocessed image tensor with error handling.
@@ -308,13 +690,15 @@ class ModelManager:
             OutOfMemoryError: If system runs out of memory
         """
         # Lazy loading - load model on first inference
-        if not self._is_loaded:
-            self._logger.log_operation_start("lazy_loading")
-            self.load_model()
+        model = self._acquire_model()
+        inference_device = self.device
         
-        # Check cache first
+        # Check cache first. The key is hashed once here, while the tensor is
+        # still on the host, and reused when storing the result.
+        cache_key = None
         if use_cache:
-            cached_prediction = self.performance_optimizer.get_cached_prediction(image_tensor)
+            cache_key = self.performance_optimizer.get_cache_key(image_tensor)
+            cached_prediction = self.performance_optimizer.get_cached_prediction(cache_key=cache_key)
             if cached_prediction is not None:
                 cached_prediction["cached"] = True
                 self._logger.log_metric("cache_hit", 1)
@@ -332,15 +716,23 @@ class ModelManager:
                 use_cache=use_cache
             )
             
-            # Move tensor to device
-            image_tensor = image_tensor.to(self.device)
-            
-            # Run inference with no gradient computation
-            with torch.no_grad():
-                outputs = self.model(image_tensor)
+            if self._batcher is not None:
+                # Shares a forward pass with other requests arriving concurrently
+                predictions = self._batcher.submit(image_tensor)
+            elif self._onnx_session is not None:
+                outputs = self._run_onnx(image_tensor)
+            else:
+                # Move tensor to device
+                image_tensor = self._to_device(image_tensor)
+                
+                # Run inference without autograd tracking (inference_mode also skips
+                # version counters and view tracking, unlike no_grad)
+                with self._inference_context():
+                    outputs = model(image_tensor)
             
             # Process outputs based on model architecture
-            predictions = self._process_model_outputs(outputs)
+            if self._batcher is None:
+                predictions = self._process_model_outputs(outputs)
             
             inference_time = time.time() - start_time
             predictions["inference_time"] = inference_time
@@ -348,8 +740,8 @@ class ModelManager:
             predictions["cached"] = False
             
             # Cache the prediction
-            if use_cache:
-                self.performance_optimizer.cache_prediction(image_tensor, predictions)
+            if cache_key is not None:
+                self.performance_optimizer.cache_prediction(None, predictions, cache_key=cache_key)
             
             self._logger.log_operation_complete(
                 "inference",
@@ -366,7 +758,7 @@ class ModelManager:
             
             # Log OOM error with memory stats
             if self.device == "cuda" and torch.cuda.is_available():
-                memory_allocated = torch.cuda.memory_allocated(0) / (1024 ** 2)
+                memory_allocated = torch.cuda.memory_allocated() / (1024 ** 2)
                 self._logger.log_warning(
                     "GPU out of memory during inference",
                     memory_allocated_mb=memory_allocated,
@@ -374,22 +766,26 @@ class ModelManager:
                 )
             
             # Automatic fallback to CPU
-            if self.device == "cuda":
+            if inference_device == "cuda":
                 self._logger.log_operation_start("inference_cpu_fallback")
                 
-                # Unload model and clear GPU memory
-                self.unload_model()
-                
-                # Reload on CPU
-                self.device_preference = "cpu"
-                self.load_model()
+                with self._model_lock:
+                    # A concurrent request may already have fallen back
+                    if self.device == "cuda":
+                        # Unload model and clear GPU memory
+                        self._unload_model()
+                        
+                        # Reload on CPU
+                        self.device_preference = "cpu"
+                        self._load_model()
+                    model = self.model
                 
                 # Retry inference on CPU
                 try:
                     cpu_start = time.time()
                     image_tensor = image_tensor.to("cpu")
-                    with torch.no_grad():
-                        outputs = self.model(image_tensor)
+                    with torch.inference_mode():
+                        outputs = model(image_tensor)
                     predictions = self._process_model_outputs(outputs)
                     predictions["device_used"] = "cpu"
                     cpu_time = time.time() - cpu_start
@@ -424,6 +820,36 @@ class ModelManager:
                 original_exception=e
             )
     
+    def _to_device(self, image_tensor: torch.Tensor) -> torch.Tensor:
+        """
+        Move an input tensor to the inference device in the model's memory format.
+        
+        On CUDA the host tensor is staged in page-locked memory (served from
+        PyTorch's pinned-memory cache) so the upload is a true async DMA that
+        queues on the stream instead of a synchronous pageable copy. If
+        pinning fails the tensor is copied from pageable memory instead.
+        
+        Args:
+            image_tensor: Input tensor with shape (N, 3, H, W)
+            
+        Returns:
+            Tensor on the inference device
+        """
+        non_blocking = False
+        if self.device == "cuda" and image_tensor.device.type == "cpu" and torch.cuda.is_available():
+            try:
+                if not image_tensor.is_pinned():
+                    image_tensor = image_tensor.pin_memory()
+                non_blocking = True
+            except RuntimeError as e:
+                # Pinning needs a working driver; a plain pageable copy still
+                # lets device errors (e.g. OOM) reach the CPU fallback
+                logger.debug(f"Could not pin input tensor, using pageable copy: {e}")
+        
+        if self._use_channels_last and image_tensor.dim() == 4:
+            return image_tensor.to(self.device, memory_format=torch.channels_last, non_blocking=non_blocking)
+        return image_tensor.to(self.device, non_blocking=non_blocking)
+    
     def _process_model_outputs(self, outputs: Any) -> Dict[str, Any]:
         """
         Process raw model outputs into structured predictions.
@@ -437,6 +863,22 @@ class ModelManager:
         Returns:
             Dictionary with structured predictions
         """
+        return self._process_batch_outputs(outputs)[0]
+    
+    def _process_batch_outputs(self, outputs: Any) -> List[Dict[str, Any]]:
+        """
+        Process raw model outputs for a whole batch into structured predictions.
+        
+        Softmax/sigmoid run once over the batch and results are copied to the
+        host in a single transfer, instead of one ``.item()`` sync per value.
+        
+        Args:
+            outputs: Raw model outputs (tensor or tuple of tensors) with a
+                leading batch dimension
+            
+        Returns:
+            List with one prediction dictionary per batch item
+        """
         # Handle different output formats
         if isinstance(outputs, tuple):
             # Multi-head model (skin_type, issues)
@@ -451,35 +893,42 @@ class ModelManager:
             issue_logits = None
         
         # Process skin type predictions
-        skin_type_probs = F.softmax(skin_type_logits, dim=1)
-        skin_type_confidence, skin_type_idx = torch.max(skin_type_probs, dim=1)
+        # Scores in FP32 even when the model ran under autocast
+        skin_type_probs = F.softmax(skin_type_logits.float(), dim=1)
+        skin_type_confidences, skin_type_indices = torch.max(skin_type_probs, dim=1)
+        skin_type_confidences = skin_type_confidences.cpu().tolist()
+        skin_type_indices = skin_type_indices.cpu().tolist()
+        
+        issue_rows = None
+        if issue_logits is not None:
+            issue_rows = torch.sigmoid(issue_logits.float()).cpu().tolist()
         
-        # Map index to skin type name
         skin_types = ["oily", "dry", "combination", "sensitive", "normal"]
-        skin_type = skin_types[skin_type_idx.item()] if skin_type_idx.item() < len(skin_types) else "unknown"
+        issue_names = ["acne", "dark_spots", "wrinkles", "redness", "dryness", "oiliness", "enlarged_pores", "uneven_tone"]
         
-        # Process issue predictions if available
-        issues = {}
-        if issue_logits is not None:
-            issue_probs = torch.sigmoid(issue_logits)
-            issue_names = ["acne", "dark_spots", "wrinkles", "redness", "dryness", "oiliness", "enlarged_pores", "uneven_tone"]
-            
-            for idx, issue_name in enumerate(issue_names):
-                if idx < issue_probs.shape[1]:
-                    confidence = issue_probs[0, idx].item()
-                    # Only include issues above confidence threshold
-                    if confidence >= self.confidence_threshold:
-                        issues[issue_name] = confidence
-        
-        return {
-            "skin_type": skin_type,
-            "skin_type_confidence": skin_type_confidence.item(),
-            "issues": issues,
-            "confidence_scores": {
-                "skin_type": skin_type_confidence.item(),
-                **issues
-            }
-        }
+        predictions = []
+        for i, (confidence, type_idx) in enumerate(zip(skin_type_confidences, skin_type_indices)):
+            # Map index to skin type name
+            skin_type = skin_types[type_idx] if type_idx < len(skin_types) else "unknown"
+            
+            # Only include issues above confidence threshold
+            issues = {}
+            if issue_rows is not None:
+                for issue_name, issue_confidence in zip(issue_names, issue_rows[i]):
+                    if issue_confidence >= self.confidence_threshold:
+                        issues[issue_name] = issue_confidence
+            
+            predictions.append({
+                "skin_type": skin_type,
+                "skin_type_confidence": confidence,
+                "issues": issues,
+                "confidence_scores": {
+                    "skin_type": confidence,
+                    **issues
+                }
+            })
+        
+        return predictions
     
     def predict_batch(self, image_tensors: list) -> list:
         """
@@ -491,29 +940,52 @@ class ModelManager:
         Returns:
             List of prediction dictionaries
         """
-        if not self._is_loaded:
-            logger.info("Model not loaded, performing lazy loading")
-            self.load_model()
+        model = self._acquire_model()
         
         try:
             start_time = time.time()
             
-            # Create batches
-            batches = self.performance_optimizer.batch_processor.create_batch(image_tensors)
+            use_cuda = self._onnx_session is None and self.device == "cuda"
+            batches = self.performance_optimizer.batch_processor.iter_batches(
+                image_tensors, pin_memory=use_cuda
+            )
             
             all_predictions = []
-            for batch_tensor in batches:
-                # Process batch
-                batch_predictions = self.performance_optimizer.batch_processor.process_batch(
-                    self.model,
-                    batch_tensor
-                )
+            if self._onnx_session is not None:
+                for batch_tensor in batches:
+                    # One forward pass and one output transfer per batch
+                    for processed in self._process_batch_outputs(self._run_onnx(batch_tensor)):
+                        processed["device_used"] = self.device
+                        all_predictions.append(processed)
+            else:
+                # On CUDA the next batch is uploaded on a side stream while the
+                # current one runs, so PCIe transfers hide behind compute
+                copy_stream = torch.cuda.Stream() if use_cuda else None
                 
-                # Process each prediction in batch
-                for pred in batch_predictions:
-                    processed = self._process_model_outputs(pred["raw_output"])
-                    processed["device_used"] = self.device
-                    all_predictions.append(processed)
+                def upload(batch_tensor):
+                    if batch_tensor is None:
+                        return None
+                    if copy_stream is None:
+                        return self._to_device(batch_tensor)
+                    with torch.cuda.stream(copy_stream):
+                        return self._to_device(batch_tensor)
+                
+                next_batch = upload(next(batches, None))
+                while next_batch is not None:
+                    batch_tensor = next_batch
+                    if copy_stream is not None:
+                        compute_stream = torch.cuda.current_stream()
+                        compute_stream.wait_stream(copy_stream)
+                        # Keep the allocator from reusing the upload's memory early
+                        batch_tensor.record_stream(compute_stream)
+                    next_batch = upload(next(batches, None))
+                    
+                    with self._inference_context():
+                        outputs = model(batch_tensor)
+                    
+                    for processed in self._process_batch_outputs(outputs):
+                        processed["device_used"] = self.device
+                        all_predictions.append(processed)
             
             batch_time = time.time() - start_time
             logger.info(f"Batch inference completed: {len(image_tensors)} images in {batch_time:.3f}s")
@@ -521,6 +993,10 @@ class ModelManager:
             
             return all_predictions
             
+        except torch.cuda.OutOfMemoryError:
+            # Raised unchanged, so predict's GPU OOM fallback to CPU still
+            # applies when the call came through the dynamic batcher
+            raise
         except Exception as e:
             logger.error(f"Batch inference failed: {e}")
             raise InferenceError(f"Batch inference failed: {e}")
@@ -543,6 +1019,16 @@ class ModelManager:
         Frees up GPU/CPU memory by removing the model and clearing caches.
         Useful for memory management in production environments.
         """
+        with self._model_lock:
+            self._unload_model()
+    
+    def _unload_model(self) -> None:
+        """Body of unload_model; the caller holds _model_lock."""
+        if self._onnx_session is not None:
+            logger.info("Releasing ONNX Runtime session")
+            self._onnx_session = None
+            self._is_loaded = False
+        
         if self.model is not None:
             logger.info("Unloading model from memory")
             
@@ -550,6 +1036,10 @@ class ModelManager:
             del self.model
             self.model = None
             self._is_loaded = False
+            self._use_channels_last = False
+            self._is_compiled = False
+            self._forward_lock = None
+            self._autocast_dtype = None
             
             # Perform cleanup
             self.performance_optimizer.cleanup()
@@ -598,7 +1088,7 @@ class ModelManager:
             info["model_size_mb"] = self.model_path.stat().st_size / (1024 * 1024)
         
         if self._is_loaded and self.device == "cuda" and torch.cuda.is_available():
-            info["gpu_memory_allocated_mb"] = torch.cuda.memory_allocated(0) / (1024 ** 2)
-            info["gpu_memory_reserved_mb"] = torch.cuda.memory_reserved(0) / (1024 ** 2)
+            info["gpu_memory_allocated_mb"] = torch.cuda.memory_allocated() / (1024 ** 2)
+            info["gpu_memory_reserved_mb"] = torch.cuda.memory_reserved() / (1024 ** 2)
         
         return info
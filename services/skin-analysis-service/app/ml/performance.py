@@ -3,16 +3,23 @@ Performance Optimization Module
 
 This module provides performance optimization utilities for ML inference including:
 - Model quantization for CPU inference
+- ONNX export for optimized runtimes (ONNX Runtime / TensorRT)
 - Prediction caching with LRU cache
 - Batch processing support
+- Dynamic batching of concurrent requests
 - Memory cleanup utilities
 """
 
 import logging
 import hashlib
 import gc
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from functools import lru_cache
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 import torch
 import torch.quantization as quantization
 import numpy as np
@@ -47,10 +54,12 @@ class ModelQuantizer:
         try:
             logger.info("Applying dynamic quantization to model...")
             
-            # Apply dynamic quantization to Linear and Conv2d layers
+            # Dynamic quantization only has kernels for Linear/RNN layers;
+            # Conv2d entries are silently skipped, so only Linear is listed.
+            # Convolutions need static quantization (see quantize_static).
             quantized_model = quantization.quantize_dynamic(
                 model,
-                {torch.nn.Linear, torch.nn.Conv2d},
+                {torch.nn.Linear},
                 dtype=torch.qint8
             )
             
@@ -80,6 +89,10 @@ class ModelQuantizer:
         
         Static quantization provides better performance than dynamic but
         requires calibration data to determine optimal quantization parameters.
+        Uses FX graph mode, which inserts quant/dequant stubs and fuses
+        conv/bn/relu patterns automatically (eager mode needs both done by hand
+        in the model definition). The fbgemm mapping quantizes conv weights
+        per output channel, which keeps accuracy close to FP32 for CNNs.
         
         Args:
             model: PyTorch model to quantize
@@ -89,28 +102,27 @@ class ModelQuantizer:
             Quantized model
         """
         try:
+            from torch.ao.quantization import get_default_qconfig_mapping
+            from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+            
             logger.info("Applying static quantization to model...")
             
             # Set model to evaluation mode
             model.eval()
             
-            # Fuse modules for better quantization
-            model = torch.quantization.fuse_modules(model, [['conv', 'bn', 'relu']])
-            
-            # Specify quantization configuration
-            model.qconfig = torch.quantization.get_default_qconfig('fbgemm')
-            
-            # Prepare model for quantization
-            torch.quantization.prepare(model, inplace=True)
+            # Trace, fuse and insert observers (per-channel weights for conv)
+            qconfig_mapping = get_default_qconfig_mapping("fbgemm")
+            example_inputs = (calibration_data[0],)
+            prepared_model = prepare_fx(model, qconfig_mapping, example_inputs)
             
             # Calibrate with sample data
             logger.info(f"Calibrating with {len(calibration_data)} samples...")
             with torch.no_grad():
                 for data in calibration_data:
-                    model(data)
+                    prepared_model(data)
             
             # Convert to quantized model
-            torch.quantization.convert(model, inplace=True)
+            model = convert_fx(prepared_model)
             
             logger.info("Static quantization completed successfully")
             return model
@@ -119,6 +131,105 @@ class ModelQuantizer:
             logger.error(f"Static quantization failed: {e}")
             logger.warning("Falling back to dynamic quantization")
             return ModelQuantizer.quantize_dynamic(model)
+    
+    @staticmethod
+    def load_calibration_data(
+        image_dir: str,
+        input_size: Tuple[int, int] = (224, 224),
+        max_samples: int = 100
+    ) -> List[torch.Tensor]:
+        """
+        Load calibration samples for quantize_static from a directory of images.
+        
+        Images are preprocessed exactly as at inference time, so the observers
+        see the serving input distribution. Files are read in name order and
+        unreadable images are skipped.
+        
+        Args:
+            image_dir: Directory containing .jpg/.jpeg/.png images
+            input_size: Model input size (height, width)
+            max_samples: Maximum number of images to load
+            
+        Returns:
+            List of preprocessed tensors with shape (1, 3, H, W)
+        """
+        from pathlib import Path
+        from app.ml.preprocessor import ImagePreprocessor
+        
+        preprocessor = ImagePreprocessor(target_size=input_size)
+        image_paths = sorted(
+            path for path in Path(image_dir).iterdir()
+            if path.suffix.lower() in (".jpg", ".jpeg", ".png")
+        )
+        
+        calibration_data = []
+        for path in image_paths:
+            if len(calibration_data) >= max_samples:
+                break
+            try:
+                with Image.open(path) as image:
+                    calibration_data.append(preprocessor.preprocess(image.convert("RGB")))
+            except Exception as e:
+                logger.warning(f"Skipping calibration image {path.name}: {e}")
+        
+        logger.info(f"Loaded {len(calibration_data)} calibration samples from {image_dir}")
+        return calibration_data
+
+
+class ModelExporter:
+    """
+    Exports models to ONNX for optimized inference runtimes.
+    
+    The exported graph can be run with ONNX Runtime or compiled into a
+    TensorRT engine (e.g. ``trtexec --onnx=model.onnx --fp16``) for the
+    fixed production input size.
+    """
+    
+    @staticmethod
+    def export_onnx(
+        model: torch.nn.Module,
+        output_path: str,
+        input_size: Tuple[int, int] = (224, 224),
+        opset_version: int = 17,
+        dynamic_batch: bool = False
+    ) -> str:
+        """
+        Export model to ONNX format.
+        
+        A static input shape (the default) gives TensorRT and other
+        ahead-of-time compilers the most room to optimize.
+        
+        Args:
+            model: PyTorch model to export
+            output_path: Destination .onnx file
+            input_size: Input image size (H, W)
+            opset_version: ONNX opset to target
+            dynamic_batch: Allow a variable batch dimension
+            
+        Returns:
+            Path of the exported model
+        """
+        model = model.cpu().eval()
+        dummy_input = torch.randn(1, 3, input_size[0], input_size[1])
+        
+        dynamic_axes = None
+        if dynamic_batch:
+            dynamic_axes = {"input": {0: "batch"}}
+        
+        logger.info(f"Exporting model to ONNX: {output_path} (input={tuple(dummy_input.shape)})")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                dummy_input,
+                output_path,
+                input_names=["input"],
+                opset_version=opset_version,
+                do_constant_folding=True,
+                dynamic_axes=dynamic_axes
+            )
+        
+        logger.info("ONNX export completed successfully")
+        return output_path
 
 
 class PredictionCache:
@@ -137,77 +248,96 @@ class PredictionCache:
             maxsize: Maximum number of cached predictions
         """
         self.maxsize = maxsize
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._access_order: List[str] = []
+        # Insertion order doubles as LRU order: O(1) move_to_end/popitem
+        # instead of list.remove() scans on every hit
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Predictions run on worker threads
+        self._lock = threading.Lock()
         logger.info(f"Prediction cache initialized with maxsize={maxsize}")
     
-    def _compute_image_hash(self, image_tensor: torch.Tensor) -> str:
+    def compute_key(self, image_tensor: torch.Tensor) -> str:
         """
         Compute hash of image tensor for cache key.
         
+        Hash the tensor before it is moved to the inference device so the
+        key can be reused for both lookup and insert without a device-to-host
+        copy. The tensor memory is hashed in place through the buffer
+        protocol rather than copied into a bytes object first.
+        
         Args:
             image_tensor: Input image tensor
             
         Returns:
             Hash string
         """
-        # Convert tensor to bytes and compute hash
-        image_bytes = image_tensor.cpu().numpy().tobytes()
-        return hashlib.sha256(image_bytes).hexdigest()
+        image_array = image_tensor.detach().cpu().contiguous().numpy()
+        return hashlib.sha256(image_array).hexdigest()
     
-    def get(self, image_tensor: torch.Tensor) -> Optional[Dict[str, Any]]:
+    # Kept for backwards compatibility
+    _compute_image_hash = compute_key
+    
+    def get(
+        self,
+        image_tensor: Optional[torch.Tensor] = None,
+        key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Get cached prediction for image.
         
         Args:
-            image_tensor: Input image tensor
+            image_tensor: Input image tensor (ignored if key is given)
+            key: Precomputed cache key from compute_key()
             
         Returns:
             Cached prediction or None if not found
         """
-        image_hash = self._compute_image_hash(image_tensor)
+        image_hash = key if key is not None else self.compute_key(image_tensor)
         
-        if image_hash in self._cache:
-            # Update access order (move to end for LRU)
-            self._access_order.remove(image_hash)
-            self._access_order.append(image_hash)
-            
+        with self._lock:
+            prediction = self._cache.get(image_hash)
+            if prediction is not None:
+                # Mark as most recently used
+                self._cache.move_to_end(image_hash)
+        
+        if prediction is not None:
             logger.debug(f"Cache hit for image hash: {image_hash[:8]}...")
-            return self._cache[image_hash].copy()
+            return prediction.copy()
         
         logger.debug(f"Cache miss for image hash: {image_hash[:8]}...")
         return None
     
-    def put(self, image_tensor: torch.Tensor, prediction: Dict[str, Any]) -> None:
+    def put(
+        self,
+        image_tensor: Optional[torch.Tensor],
+        prediction: Dict[str, Any],
+        key: Optional[str] = None
+    ) -> None:
         """
         Store prediction in cache.
         
         Args:
-            image_tensor: Input image tensor
+            image_tensor: Input image tensor (ignored if key is given)
             prediction: Prediction result to cache
+            key: Precomputed cache key from compute_key()
         """
-        image_hash = self._compute_image_hash(image_tensor)
-        
-        # Evict oldest entry if cache is full
-        if len(self._cache) >= self.maxsize and image_hash not in self._cache:
-            oldest_hash = self._access_order.pop(0)
-            del self._cache[oldest_hash]
-            logger.debug(f"Evicted oldest cache entry: {oldest_hash[:8]}...")
+        image_hash = key if key is not None else self.compute_key(image_tensor)
         
-        # Add or update cache entry
-        if image_hash not in self._cache:
-            self._access_order.append(image_hash)
-        else:
-            self._access_order.remove(image_hash)
-            self._access_order.append(image_hash)
+        with self._lock:
+            # Add or update cache entry as most recently used
+            self._cache[image_hash] = prediction.copy()
+            self._cache.move_to_end(image_hash)
+            
+            # Evict oldest entries if cache is full
+            while len(self._cache) > self.maxsize:
+                oldest_hash, _ = self._cache.popitem(last=False)
+                logger.debug(f"Evicted oldest cache entry: {oldest_hash[:8]}...")
         
-        self._cache[image_hash] = prediction.copy()
         logger.debug(f"Cached prediction for image hash: {image_hash[:8]}...")
     
     def clear(self) -> None:
         """Clear all cached predictions."""
-        self._cache.clear()
-        self._access_order.clear()
+        with self._lock:
+            self._cache.clear()
         logger.info("Prediction cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -257,22 +387,69 @@ class BatchProcessor:
         Returns:
             List of batched tensors
         """
-        batches = []
+        batches = list(self.iter_batches(image_tensors))
+        logger.debug(f"Created {len(batches)} batches from {len(image_tensors)} images")
+        return batches
+    
+    def iter_batches(
+        self,
+        image_tensors: List[torch.Tensor],
+        pin_memory: bool = False
+    ) -> Iterator[torch.Tensor]:
+        """
+        Lazily stack image tensors into batches.
+        
+        Only the batch being handed out is materialized, instead of a second
+        copy of every input. With pin_memory, each batch is stacked straight
+        into page-locked memory, so the device upload is an async DMA without
+        an extra pinning copy.
         
+        Args:
+            image_tensors: List of individual image tensors
+            pin_memory: Stack into pinned host memory (for CUDA uploads)
+            
+        Yields:
+            Batched tensors of shape (N, C, H, W)
+        """
         for i in range(0, len(image_tensors), self.batch_size):
-            batch = image_tensors[i:i + self.batch_size]
+            # Remove batch dimension if present (shape: [1, C, H, W] -> [C, H, W])
+            batch = [
+                t.squeeze(0) if t.dim() == 4 else t
+                for t in image_tensors[i:i + self.batch_size]
+            ]
+            
+            if pin_memory:
+                batch_tensor = torch.empty(
+                    (len(batch),) + tuple(batch[0].shape),
+                    dtype=batch[0].dtype,
+                    pin_memory=True
+                )
+                torch.stack(batch, out=batch_tensor)
+                yield batch_tensor
+            else:
+                yield torch.stack(batch)
+    
+    def run_batch(
+        self,
+        model: torch.nn.Module,
+        batch_tensor: torch.Tensor
+    ) -> Any:
+        """
+        Run a single forward pass over a batch of images.
+        
+        Args:
+            model: PyTorch model
+            batch_tensor: Batched image tensor
             
-            # Stack tensors into batch
-            if len(batch) > 0:
-                # Remove batch dimension if present (shape: [1, C, H, W] -> [C, H, W])
-                batch = [t.squeeze(0) if t.dim() == 4 else t for t in batch]
-                
-                # Stack into batch tensor
-                batch_tensor = torch.stack(batch)
-                batches.append(batch_tensor)
+        Returns:
+            Raw model outputs for the whole batch
+        """
+        # Move batch to device
+        batch_tensor = batch_tensor.to(self.device)
         
-        logger.debug(f"Created {len(batches)} batches from {len(image_tensors)} images")
-        return batches
+        # Run inference
+        with torch.inference_mode():
+            return model(batch_tensor)
     
     def process_batch(
         self,
@@ -290,12 +467,7 @@ class BatchProcessor:
             List of predictions for each image in batch
         """
         try:
-            # Move batch to device
-            batch_tensor = batch_tensor.to(self.device)
-            
-            # Run inference
-            with torch.no_grad():
-                outputs = model(batch_tensor)
+            outputs = self.run_batch(model, batch_tensor)
             
             # Process outputs for each image in batch
             predictions = []
@@ -322,63 +494,169 @@ class BatchProcessor:
         self,
         model: torch.nn.Module,
         input_size: Tuple[int, int],
-        device: str = "cuda"
+        device: str = "cuda",
+        max_batch_size: int = 32,
+        memory_fraction: float = 0.7,
+        prepare_input: Optional[Callable[[torch.Tensor], torch.Tensor]] = None,
+        inference_context: Optional[Callable[[], Any]] = None
     ) -> int:
         """
         Determine optimal batch size based on available memory.
         
+        Probes batch sizes 1, 2, 4, ... with dummy forward passes and returns
+        the largest power of two whose peak memory stays within
+        memory_fraction of the GPU memory that was free when probing started.
+        
         Args:
-            model: PyTorch model
+            model: PyTorch model, already on the target device
             input_size: Input image size (H, W)
             device: Device to test on
+            max_batch_size: Upper bound for the probe
+            memory_fraction: Share of free GPU memory a batch may use
+            prepare_input: Moves/lays out the dummy batch the way real inputs are
+            inference_context: Factory for the context inference runs under
+                (e.g. inference_mode plus autocast), so the probe sees the same
+                activation dtypes as serving
             
         Returns:
             Optimal batch size
         """
-        if device == "cpu":
+        if device == "cpu" or not torch.cuda.is_available():
             return self.batch_size
         
+        prepare_input = prepare_input or (lambda t: t.to(device))
+        inference_context = inference_context or torch.inference_mode
+        
         try:
-            # Start with batch size of 1 and increase until OOM
-            test_batch_size = 1
-            max_batch_size = 32
+            torch.cuda.empty_cache()
+            free_bytes = torch.cuda.mem_get_info()[0]
+            budget = int(free_bytes * memory_fraction)
+            baseline = torch.cuda.memory_allocated()
             
-            model = model.to(device)
-            model.eval()
+            optimal_size = 0
+            test_batch_size = 1
             
             while test_batch_size <= max_batch_size:
+                torch.cuda.reset_peak_memory_stats()
                 try:
-                    # Create test batch
-                    test_input = torch.randn(
-                        test_batch_size, 3, input_size[0], input_size[1]
-                    ).to(device)
-                    
-                    # Try inference
-                    with torch.no_grad():
-                        _ = model(test_input)
-                    
-                    # Clear memory
+                    test_input = prepare_input(
+                        torch.zeros(test_batch_size, 3, input_size[0], input_size[1])
+                    )
+                    with inference_context():
+                        model(test_input)
+                    torch.cuda.synchronize()
                     del test_input
+                except torch.cuda.OutOfMemoryError:
+                    break
+                finally:
                     torch.cuda.empty_cache()
-                    
-                    # Increase batch size
-                    test_batch_size *= 2
-                    
-                except RuntimeError as e:
-                    if "out of memory" in str(e):
-                        # Found the limit, use previous batch size
-                        optimal_size = test_batch_size // 2
-                        logger.info(f"Optimal batch size determined: {optimal_size}")
-                        return optimal_size
-                    raise
-            
-            return max_batch_size
+                
+                if torch.cuda.max_memory_allocated() - baseline > budget:
+                    break
+                
+                optimal_size = test_batch_size
+                test_batch_size *= 2
+            
+            optimal_size = max(optimal_size, 1)
+            logger.info(
+                f"Optimal batch size determined: {optimal_size} "
+                f"(budget {budget / 1024 ** 2:.0f}MB of {free_bytes / 1024 ** 2:.0f}MB free)"
+            )
+            return optimal_size
             
         except Exception as e:
             logger.error(f"Failed to determine optimal batch size: {e}")
             return self.batch_size
 
 
+class DynamicBatcher:
+    """
+    Groups concurrent single-image requests into one batched forward pass.
+    
+    Callers block in submit(); a worker thread collects requests until either
+    max_batch_size is reached or max_wait_ms has passed since the first one,
+    runs them as a single batch and hands each caller its own result. Under
+    concurrent load this turns N small forward passes into one, at the cost of
+    at most max_wait_ms extra latency for the first request of a batch.
+    """
+    
+    def __init__(
+        self,
+        run_batch: Callable[[List[torch.Tensor]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize dynamic batcher.
+        
+        Args:
+            run_batch: Function mapping a list of image tensors to a list of
+                results in the same order (e.g. ModelManager.predict_batch)
+            max_batch_size: Maximum number of requests per forward pass
+            max_wait_ms: Maximum time to wait for a batch to fill
+        """
+        self._run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._requests: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        logger.info(f"Dynamic batcher initialized with max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms}")
+    
+    def submit(self, image_tensor: torch.Tensor) -> Any:
+        """
+        Queue an image for the next batch and wait for its result.
+        
+        Args:
+            image_tensor: Preprocessed image tensor with shape (1, 3, H, W)
+            
+        Returns:
+            The result produced for this image by run_batch
+        """
+        future: Future = Future()
+        self._ensure_worker()
+        self._requests.put((image_tensor, future))
+        return future.result()
+    
+    def _ensure_worker(self) -> None:
+        """Start the worker thread on first use"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="dynamic-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self) -> None:
+        """Worker loop: collect a batch, run it, resolve the callers' futures"""
+        while True:
+            pending = [self._requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self._run_batch([image_tensor for image_tensor, _ in pending])
+            except BaseException as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(pending, results):
+                future.set_result(result)
+
+
 class MemoryManager:
     """
     Utilities for memory management and cleanup.
@@ -425,10 +703,10 @@ class MemoryManager:
         try:
             if device == "cuda" and torch.cuda.is_available():
                 stats["device"] = "cuda"
-                stats["allocated_mb"] = torch.cuda.memory_allocated(0) / (1024 ** 2)
-                stats["reserved_mb"] = torch.cuda.memory_reserved(0) / (1024 ** 2)
-                stats["max_allocated_mb"] = torch.cuda.max_memory_allocated(0) / (1024 ** 2)
-                stats["total_mb"] = torch.cuda.get_device_properties(0).total_memory / (1024 ** 2)
+                stats["allocated_mb"] = torch.cuda.memory_allocated() / (1024 ** 2)
+                stats["reserved_mb"] = torch.cuda.memory_reserved() / (1024 ** 2)
+                stats["max_allocated_mb"] = torch.cuda.max_memory_allocated() / (1024 ** 2)
+                stats["total_mb"] = torch.cuda.get_device_properties(torch.cuda.current_device()).total_memory / (1024 ** 2)
                 stats["utilization"] = stats["allocated_mb"] / stats["total_mb"]
             else:
                 stats["device"] = "cpu"
@@ -465,8 +743,8 @@ class MemoryManager:
         try:
             if device == "cuda" and torch.cuda.is_available():
                 available_mb = (
-                    torch.cuda.get_device_properties(0).total_memory / (1024 ** 2)
-                    - torch.cuda.memory_allocated(0) / (1024 ** 2)
+                    torch.cuda.get_device_properties(torch.cuda.current_device()).total_memory / (1024 ** 2)
+                    - torch.cuda.memory_allocated() / (1024 ** 2)
                 )
                 return available_mb >= required_mb
             else:
@@ -487,7 +765,7 @@ class MemoryManager:
         """
         try:
             if device == "cuda" and torch.cuda.is_available():
-                torch.cuda.reset_peak_memory_stats(0)
+                torch.cuda.reset_peak_memory_stats()
                 logger.debug("Peak memory stats reset")
         except Exception as e:
             logger.error(f"Failed to reset peak memory stats: {e}")
@@ -545,33 +823,55 @@ class PerformanceOptimizer:
         Returns:
             Optimized model
         """
-        if self.enable_quantization and self.device == "cpu":
+        # Quantized kernels are CPU-only; check where the model actually lives
+        # (the configured device is "cpu" for DEVICE=auto even on a GPU host)
+        first_param = next(model.parameters(), None)
+        on_cpu = first_param is None or first_param.device.type == "cpu"
+        
+        if self.enable_quantization and on_cpu:
             logger.info("Applying quantization for CPU inference...")
             model = self.quantizer.quantize_dynamic(model)
         
         return model
     
+    def get_cache_key(self, image_tensor: torch.Tensor) -> Optional[str]:
+        """
+        Compute the cache key for an image tensor.
+        
+        Args:
+            image_tensor: Input image tensor (ideally still on the host)
+            
+        Returns:
+            Cache key, or None if caching is disabled
+        """
+        if self.cache:
+            return self.cache.compute_key(image_tensor)
+        return None
+    
     def get_cached_prediction(
         self,
-        image_tensor: torch.Tensor
+        image_tensor: Optional[torch.Tensor] = None,
+        cache_key: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Get cached prediction if available.
         
         Args:
             image_tensor: Input image tensor
+            cache_key: Precomputed key from get_cache_key()
             
         Returns:
             Cached prediction or None
         """
         if self.cache:
-            return self.cache.get(image_tensor)
+            return self.cache.get(image_tensor, key=cache_key)
         return None
     
     def cache_prediction(
         self,
-        image_tensor: torch.Tensor,
-        prediction: Dict[str, Any]
+        image_tensor: Optional[torch.Tensor],
+        prediction: Dict[str, Any],
+        cache_key: Optional[str] = None
     ) -> None:
         """
         Cache prediction result.
@@ -579,9 +879,10 @@ class PerformanceOptimizer:
         Args:
             image_tensor: Input image tensor
             prediction: Prediction to cache
+            cache_key: Precomputed key from get_cache_key()
         """
         if self.cache:
-            self.cache.put(image_tensor, prediction)
+            self.cache.put(image_tensor, prediction, key=cache_key)
     
     def cleanup(self) -> None:
         """Perform cleanup operations."""
@@ -16,6 +16,7 @@ from skimage.filters import gaussian
 from app.core.config import settings
 from app.core.ml_config import ml_settings
 from app.ml.model_manager import ModelManager
+from app.services.image_service import ImageService
 from app.ml.preprocessor import ImagePreprocessor
 from app.ml.postprocessor import PostProcessor
 from app.ml.exceptions import (
@@ -42,6 +43,11 @@ class AIService:
     def __init__(self):
         self.model_version = ml_settings.MODEL_VERSION
         self.models_dir = settings.MODELS_DIR
+        
+        # Per-request settings, resolved once instead of on every analysis
+        self.use_prediction_cache = ml_settings.ENABLE_PREDICTION_CACHE
+        self.cleanup_interval = ml_settings.CLEANUP_INTERVAL if ml_settings.AUTO_CLEANUP_MEMORY else 0
+        self.max_analysis_time = settings.MAX_ANALYSIS_TIME
         self._ensure_models_directory()
         
         # Initialize structured logger
@@ -58,7 +64,16 @@ class AIService:
                 enable_quantization=ml_settings.ENABLE_QUANTIZATION,
                 enable_caching=ml_settings.ENABLE_PREDICTION_CACHE,
                 cache_size=ml_settings.PREDICTION_CACHE_SIZE,
-                batch_size=ml_settings.MAX_BATCH_SIZE
+                batch_size=ml_settings.MAX_BATCH_SIZE,
+                channels_last=ml_settings.ENABLE_CHANNELS_LAST,
+                input_size=ml_settings.INPUT_SIZE,
+                compile_model=ml_settings.ENABLE_TORCH_COMPILE,
+                compile_mode=ml_settings.TORCH_COMPILE_MODE,
+                onnx_model_path=ml_settings.ONNX_MODEL_PATH if ml_settings.ENABLE_ONNX else None,
+                dynamic_batch_size=ml_settings.BATCH_SIZE if ml_settings.ENABLE_BATCH_PROCESSING else 1,
+                max_batch_wait_ms=ml_settings.BATCH_MAX_WAIT_MS,
+                precision=ml_settings.INFERENCE_PRECISION,
+                auto_batch_size=ml_settings.AUTO_BATCH_SIZE
             )
             self.preprocessor = ImagePreprocessor(target_size=ml_settings.INPUT_SIZE)
             self.postprocessor = PostProcessor(
@@ -145,67 +160,15 @@ class AIService:
             raise Exception("ML components not initialized")
         
         try:
-            start_time = time.time()
-            
-            # Step 1: Load and preprocess image
+            # Step 1: Load image (decoding is lazy and happens on the worker)
             logger.debug(f"Loading image from {image_path}")
-            image = Image.open(image_path)
-            
-            # Validate image
-            if not self.preprocessor.validate_image(image):
-                raise ValueError("Invalid image format or quality")
-            
-            preprocess_start = time.time()
-            image_tensor = self.preprocessor.preprocess(image)
-            preprocess_time = time.time() - preprocess_start
-            logger.debug(f"Image preprocessing completed in {preprocess_time:.3f}s")
-            
-            # Step 2: Run inference
-            inference_start = time.time()
-            predictions = self.model_manager.predict(image_tensor, use_cache=ml_settings.ENABLE_PREDICTION_CACHE)
-            inference_time = time.time() - inference_start
-            
-            # Track inference count for memory cleanup
-            self._inference_count += 1
-            
-            # Perform periodic memory cleanup if enabled
-            if ml_settings.AUTO_CLEANUP_MEMORY and self._inference_count % ml_settings.CLEANUP_INTERVAL == 0:
-                logger.debug(f"Performing periodic memory cleanup (inference count: {self._inference_count})")
-                self.model_manager.cleanup_memory()
-            
-            cached_str = " (cached)" if predictions.get("cached", False) else ""
-            logger.debug(f"Model inference completed in {inference_time:.3f}s on {predictions.get('device_used', 'unknown')}{cached_str}")
-            
-            # Step 3: Post-process results
-            postprocess_start = time.time()
-            processed_results = self.postprocessor.process_predictions(
-                predictions,
-                image,
-                analysis_id=None  # Will be auto-generated
-            )
-            postprocess_time = time.time() - postprocess_start
-            logger.debug(f"Post-processing completed in {postprocess_time:.3f}s")
+            image = ImageService.load_pil_image(image_path)
             
-            # Calculate total time
-            total_time = time.time() - start_time
-            
-            # Format response
-            result = {
-                "skin_type": processed_results["skin_type"],
-                "issues": processed_results["issues"],
-                "analysis_timestamp": datetime.utcnow().isoformat(),
-                "model_confidence": processed_results["metadata"]["skin_type_confidence"],
-                "inference_time": inference_time,
-                "total_processing_time": total_time,
-                "device_used": predictions.get("device_used", "unknown"),
-                "model_version": self.model_version,
-                "timing_breakdown": {
-                    "preprocessing": preprocess_time,
-                    "inference": inference_time,
-                    "postprocessing": postprocess_time,
-                    "total": total_time
-                }
-            }
+            # Preprocessing, inference and post-processing are blocking CPU/GPU
+            # work; run them on a worker thread so the event loop keeps serving
+            # other requests (and concurrent requests can share a dynamic batch)
+            result = await asyncio.to_thread(self._run_ml_pipeline, image)
+            total_time = result["total_processing_time"]
             
             logger.info(f"ML analysis completed successfully in {total_time:.3f}s")
             logger.info(f"Detected skin type: {result['skin_type']}, Issues: {len(result['issues'])}")
@@ -224,6 +187,68 @@ class AIService:
             logger.error(f"ML analysis pipeline failed: {type(e).__name__}: {e}")
             raise
     
+    def _run_ml_pipeline(self, image: Image.Image) -> Dict[str, Any]:
+        """Preprocess, infer and post-process one image (blocking; runs on a worker thread)"""
+        start_time = time.time()
+        
+        # Validate image
+        if not self.preprocessor.validate_image(image):
+            raise ValueError("Invalid image format or quality")
+        
+        preprocess_start = time.time()
+        image_tensor = self.preprocessor.preprocess(image)
+        preprocess_time = time.time() - preprocess_start
+        logger.debug(f"Image preprocessing completed in {preprocess_time:.3f}s")
+        
+        # Step 2: Run inference
+        inference_start = time.time()
+        predictions = self.model_manager.predict(image_tensor, use_cache=self.use_prediction_cache)
+        inference_time = time.time() - inference_start
+        
+        # Track inference count for memory cleanup
+        self._inference_count += 1
+        
+        # Perform periodic memory cleanup if enabled
+        if self.cleanup_interval and self._inference_count % self.cleanup_interval == 0:
+            logger.debug(f"Performing periodic memory cleanup (inference count: {self._inference_count})")
+            self.model_manager.cleanup_memory()
+        
+        cached_str = " (cached)" if predictions.get("cached", False) else ""
+        logger.debug(f"Model inference completed in {inference_time:.3f}s on {predictions.get('device_used', 'unknown')}{cached_str}")
+        
+        # Step 3: Post-process results
+        postprocess_start = time.time()
+        processed_results = self.postprocessor.process_predictions(
+            predictions,
+            image,
+            analysis_id=None  # Will be auto-generated
+        )
+        postprocess_time = time.time() - postprocess_start
+        logger.debug(f"Post-processing completed in {postprocess_time:.3f}s")
+        
+        # Calculate total time
+        total_time = time.time() - start_time
+        
+        # Format response
+        result = {
+            "skin_type": processed_results["skin_type"],
+            "issues": processed_results["issues"],
+            "analysis_timestamp": datetime.utcnow().isoformat(),
+            "model_confidence": processed_results["metadata"]["skin_type_confidence"],
+            "inference_time": inference_time,
+            "total_processing_time": total_time,
+            "device_used": predictions.get("device_used", "unknown"),
+            "model_version": self.model_version,
+            "timing_breakdown": {
+                "preprocessing": preprocess_time,
+                "inference": inference_time,
+                "postprocessing": postprocess_time,
+                "total": total_time
+            }
+        }
+        
+        return result
+    
     async def analyze_skin_image(self, image_path: str) -> Dict[str, Any]:
         """
         Analyze skin image using ML model with graceful degradation.
@@ -261,7 +286,7 @@ class AIService:
                         analysis_result = await self._analyze_with_free_api(preprocessed_image, image_path)
                         model_source_used = "free_api"
                     elif model_source == "mock_analysis":
-                        image = cv2.imread(image_path)
+                        image = ImageService.load_image(image_path)
                         analysis_result = await self._mock_skin_analysis(image)
                         model_source_used = "mock_analysis"
                     
@@ -284,8 +309,8 @@ class AIService:
             analysis_result["model_source"] = model_source_used
             
             # Check processing time requirement
-            if processing_time > settings.MAX_ANALYSIS_TIME:
-                logger.warning(f"Analysis took {processing_time:.2f}s, exceeding {settings.MAX_ANALYSIS_TIME}s limit")
+            if processing_time > self.max_analysis_time:
+                logger.warning(f"Analysis took {processing_time:.2f}s, exceeding {self.max_analysis_time}s limit")
             
             logger.info(f"Skin analysis completed for image: {image_path} in {processing_time:.2f}s using {model_source_used}")
             return analysis_result
@@ -400,14 +425,15 @@ class AIService:
         Will be implemented with actual model requirements in subtask 4.1
         """
         try:
-            image = cv2.imread(image_path)
+            image = ImageService.load_image(image_path)
             if image is None:
                 raise ValueError("Could not load image")
             
             # Basic preprocessing - will be enhanced for actual model
             image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             image_resized = cv2.resize(image_rgb, (224, 224))  # Common input size
-            image_normalized = image_resized.astype(np.float32) / 255.0
+            # Scale and convert to float32 in a single pass (no float64/int temporaries)
+            image_normalized = np.divide(image_resized, np.float32(255.0), dtype=np.float32)
             
             return image_normalized
             
@@ -489,7 +515,7 @@ class AIService:
         """
         try:
             # Convert image to bytes for API
-            image_pil = Image.fromarray((image * 255).astype(np.uint8))
+            image_pil = Image.fromarray(cv2.convertScaleAbs(image, alpha=255.0))
             
             # For skin analysis, we'll use a combination of approaches:
             # 1. Image classification for skin type
@@ -712,7 +738,7 @@ class AIService:
         """Create highlighted image showing detected issue regions"""
         try:
             # Load original image
-            image = Image.open(original_path)
+            image = ImageService.load_pil_image(original_path)
             
             # Create a copy for highlighting
             highlighted = image.copy()
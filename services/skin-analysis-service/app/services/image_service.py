@@ -1,17 +1,32 @@
 from fastapi import UploadFile, HTTPException
 import aiofiles
+import asyncio
 import os
+import threading
 import uuid
 from PIL import Image
 import cv2
 import numpy as np
-from typing import Tuple
+from collections import OrderedDict
+from typing import Optional, Tuple
 import logging
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Processed images of in-flight requests, keyed by the path they were saved to:
+# path -> (encoded file bytes, read-only decoded BGR array). The file is still
+# written (results reference it), but the hash, quality check and analysis
+# steps of the same request read from here instead of re-reading and
+# re-decoding it. Only touched from the event loop thread.
+_processed_images: "OrderedDict[str, Tuple[bytes, np.ndarray]]" = OrderedDict()
+_MAX_PROCESSED_IMAGES = 16
+
+# CLAHE objects keep internal work buffers and aren't thread-safe; preprocessing
+# runs on worker threads, so each thread builds its own once and reuses it
+_clahe_local = threading.local()
+
 
 class ImageService:
     """Service for handling image upload, validation, and preprocessing"""
@@ -66,32 +81,31 @@ class ImageService:
             )
     
     async def save_and_process_image(self, image: UploadFile) -> str:
-        """Save uploaded image and perform basic preprocessing"""
+        """Decode the upload in memory, preprocess it and save only the processed image"""
         
         # Generate unique filename
         file_extension = os.path.splitext(image.filename)[1] if image.filename else '.jpg'
         unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(self.upload_dir, unique_filename)
+        processed_path = os.path.join(self.upload_dir, f"processed_{unique_filename}")
         
         try:
-            # Save uploaded file
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await image.read()
-                await f.write(content)
-            
-            # Process image for analysis
-            processed_path = await self.preprocess_image(file_path)
+            # Decode straight from the request bytes; the original is never
+            # written to disk and read back
+            content = await image.read()
             
-            # Remove original if different from processed
-            if processed_path != file_path:
-                os.remove(file_path)
+            # Decode, preprocess and encode are blocking OpenCV calls; run them
+            # on a worker thread so the event loop keeps serving requests
+            processed = await asyncio.to_thread(self._process_bytes, content, processed_path)
+            self._remember_processed(processed_path, processed)
             
             return processed_path
             
         except Exception as e:
             # Clean up on error
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            try:
+                os.remove(processed_path)
+            except FileNotFoundError:
+                pass
             logger.error(f"Failed to save and process image: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to process image")
     
@@ -99,28 +113,11 @@ class ImageService:
         """Preprocess image for optimal AI model input"""
         
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("Could not load image")
-            
-            # Convert BGR to RGB
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Resize image to standard size (512x512 for most skin analysis models)
-            target_size = (512, 512)
-            image_resized = cv2.resize(image_rgb, target_size, interpolation=cv2.INTER_LANCZOS4)
-            
-            # Normalize image quality
-            image_normalized = self._normalize_image_quality(image_resized)
-            
             # Save processed image
             processed_filename = f"processed_{os.path.basename(image_path)}"
             processed_path = os.path.join(self.upload_dir, processed_filename)
-            
-            # Convert back to BGR for saving with OpenCV
-            image_bgr = cv2.cvtColor(image_normalized, cv2.COLOR_RGB2BGR)
-            cv2.imwrite(processed_path, image_bgr)
+            processed = await asyncio.to_thread(self._process_file, image_path, processed_path)
+            self._remember_processed(processed_path, processed)
             
             return processed_path
             
@@ -128,20 +125,112 @@ class ImageService:
             logger.error(f"Image preprocessing failed: {str(e)}")
             raise HTTPException(status_code=500, detail="Image preprocessing failed")
     
+    def _process_bytes(self, content: bytes, processed_path: str) -> Tuple[bytes, np.ndarray]:
+        """Decode encoded image bytes, preprocess and save (blocking)"""
+        image = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode image")
+        return self._write_processed_image(self._preprocess_array(image), processed_path)
+    
+    def _process_file(self, image_path: str, processed_path: str) -> Tuple[bytes, np.ndarray]:
+        """Load an image from disk, preprocess and save (blocking)"""
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError("Could not load image")
+        return self._write_processed_image(self._preprocess_array(image), processed_path)
+    
+    def _preprocess_array(self, image: np.ndarray) -> np.ndarray:
+        """Resize and normalize a decoded BGR image, returning BGR
+        
+        The frame stays BGR from decode to imwrite; the only color conversion
+        is the BGR <-> LAB round trip the normalization needs.
+        """
+        
+        # Resize image to standard size (512x512 for most skin analysis models)
+        target_size = (512, 512)
+        # Uploads are almost always larger than the target: INTER_AREA averages
+        # source pixels in one pass, much cheaper than the 8x8 Lanczos kernel
+        # and alias-free when shrinking. Lanczos is kept for upscaling.
+        height, width = image.shape[:2]
+        if width >= target_size[0] and height >= target_size[1]:
+            interpolation = cv2.INTER_AREA
+        else:
+            interpolation = cv2.INTER_LANCZOS4
+        image_resized = cv2.resize(image, target_size, interpolation=interpolation)
+        
+        # Normalize image quality
+        return self._normalize_image_quality(image_resized)
+    
+    def _write_processed_image(self, image_bgr: np.ndarray, processed_path: str) -> Tuple[bytes, np.ndarray]:
+        """Save a processed BGR image to disk, returning (encoded bytes, image)"""
+        success, buffer = cv2.imencode(os.path.splitext(processed_path)[1], image_bgr)
+        if not success:
+            raise ValueError(f"Could not write processed image to {processed_path}")
+        encoded = buffer.tobytes()
+        with open(processed_path, 'wb') as f:
+            f.write(encoded)
+        return encoded, image_bgr
+    
+    @staticmethod
+    def _remember_processed(processed_path: str, processed: Tuple[bytes, np.ndarray]) -> None:
+        """Keep a processed image in memory for the rest of the request"""
+        # Shared between readers, so make accidental in-place edits fail loudly
+        processed[1].flags.writeable = False
+        _processed_images[processed_path] = processed
+        _processed_images.move_to_end(processed_path)
+        while len(_processed_images) > _MAX_PROCESSED_IMAGES:
+            _processed_images.popitem(last=False)
+    
+    @staticmethod
+    def get_processed_image(image_path: str) -> Optional[np.ndarray]:
+        """Decoded (read-only, BGR) processed image if still in memory"""
+        processed = _processed_images.get(image_path)
+        return processed[1] if processed is not None else None
+    
+    @staticmethod
+    def get_processed_bytes(image_path: str) -> Optional[bytes]:
+        """Encoded processed image file contents if still in memory"""
+        processed = _processed_images.get(image_path)
+        return processed[0] if processed is not None else None
+    
+    @classmethod
+    def load_image(cls, image_path: str) -> Optional[np.ndarray]:
+        """BGR image from memory when available, else read from disk (may be read-only)"""
+        image = cls.get_processed_image(image_path)
+        if image is None:
+            image = cv2.imread(image_path)
+        return image
+    
+    @classmethod
+    def load_pil_image(cls, image_path: str) -> Image.Image:
+        """RGB PIL image from memory when available, else opened from disk"""
+        image = cls.get_processed_image(image_path)
+        if image is None:
+            return Image.open(image_path)
+        return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    
+    @staticmethod
+    def _get_clahe() -> cv2.CLAHE:
+        """CLAHE for the calling thread, created on first use"""
+        clahe = getattr(_clahe_local, "clahe", None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            _clahe_local.clahe = clahe
+        return clahe
+    
     def _normalize_image_quality(self, image: np.ndarray) -> np.ndarray:
-        """Normalize image brightness and contrast"""
+        """Normalize brightness and contrast of a BGR image"""
         
         # Convert to LAB color space for better brightness adjustment
-        lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
         l_channel, a_channel, b_channel = cv2.split(lab)
         
         # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) to L channel
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l_channel = clahe.apply(l_channel)
+        l_channel = self._get_clahe().apply(l_channel)
         
-        # Merge channels and convert back to RGB
+        # Merge channels and convert back to BGR
         lab = cv2.merge([l_channel, a_channel, b_channel])
-        enhanced_image = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+        enhanced_image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
         
         return enhanced_image
     
@@ -149,21 +238,22 @@ class ImageService:
         """Calculate image quality score (0.0 to 1.0)"""
         
         try:
-            image = cv2.imread(image_path)
+            image = self.load_image(image_path)
             if image is None:
                 return 0.0
             
             # Convert to grayscale for quality analysis
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
-            # Calculate sharpness using Laplacian variance
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-            
-            # Calculate brightness
-            brightness = np.mean(gray)
+            # Calculate sharpness using Laplacian variance; int16 holds the
+            # 3x3 Laplacian of uint8 input exactly at a quarter of CV_64F's size
+            _, laplacian_std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+            laplacian_var = float(laplacian_std[0, 0]) ** 2
             
-            # Calculate contrast
-            contrast = gray.std()
+            # Brightness and contrast from a single pass over the gray image
+            gray_mean, gray_std = cv2.meanStdDev(gray)
+            brightness = float(gray_mean[0, 0])
+            contrast = float(gray_std[0, 0])
             
             # Normalize scores (these thresholds may need tuning)
             sharpness_score = min(laplacian_var / 1000.0, 1.0)  # Normalize to 0-1
@@ -181,10 +271,13 @@ class ImageService:
     
     async def cleanup_file(self, file_path: str) -> None:
         """Clean up temporary files"""
+        _processed_images.pop(file_path, None)
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Cleaned up file: {file_path}")
+            # Remove directly instead of stat-ing first: one syscall, no race
+            os.remove(file_path)
+            logger.info(f"Cleaned up file: {file_path}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.error(f"Failed to cleanup file {file_path}: {str(e)}")
     
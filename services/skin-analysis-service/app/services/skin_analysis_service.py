@@ -50,8 +50,10 @@ class SkinAnalysisService:
     def _generate_image_hash(self, image_path: str) -> str:
         """Generate hash for image file"""
         try:
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
+            image_data = self.image_service.get_processed_bytes(image_path)
+            if image_data is None:
+                with open(image_path, 'rb') as f:
+                    image_data = f.read()
             return hashlib.sha256(image_data).hexdigest()
         except Exception as e:
             logger.error(f"Failed to generate image hash: {e}")
@@ -224,7 +226,7 @@ class SkinAnalysisService:
         """Load image as numpy array for processing"""
         try:
             import cv2
-            image = cv2.imread(image_path)
+            image = self.image_service.load_image(image_path)
             return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         except Exception as e:
             logger.error(f"Failed to load image array: {str(e)}")
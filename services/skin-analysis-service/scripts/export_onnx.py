@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+ONNX Export Script
+
+Exports the configured skin analysis model to ONNX with a fixed input
+shape, ready for ONNX Runtime or TensorRT:
+
+    python scripts/export_onnx.py
+    trtexec --onnx=models/efficientnet_b0.onnx --fp16 --saveEngine=models/efficientnet_b0.engine
+"""
+
+import sys
+import logging
+from pathlib import Path
+import torch
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ml.performance import ModelExporter
+from app.core.ml_config import ml_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main export entry point."""
+    model_path = ml_settings.get_model_path()
+    output_path = ml_settings.ONNX_MODEL_PATH or str(model_path.with_suffix(".onnx"))
+    
+    if not model_path.exists():
+        logger.error(f"Model file not found: {model_path}")
+        sys.exit(1)
+    
+    model = torch.load(model_path, map_location="cpu", weights_only=False)
+    if not isinstance(model, torch.nn.Module):
+        logger.error("Model file contains a state dict; a full model object is required for export")
+        sys.exit(1)
+    
+    ModelExporter.export_onnx(model, output_path, input_size=ml_settings.INPUT_SIZE)
+    logger.info(f"✓ Exported {model_path} -> {output_path}")
+
+
+if __name__ == "__main__":
+    main()
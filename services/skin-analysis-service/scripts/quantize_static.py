@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Static INT8 Quantization Script
+
+Quantizes the configured skin analysis model for CPU inference, calibrating
+activation ranges on a directory of representative face images:
+
+    python scripts/quantize_static.py path/to/calibration_images
+    MODEL_PATH=models/efficientnet_b0.int8.pth ENABLE_QUANTIZATION=false python -m app.main
+
+Unlike ENABLE_QUANTIZATION (dynamic, Linear layers only), this also runs the
+convolutions in INT8. The result is saved next to the model as *.int8.pth,
+in TorchScript form: a pickled quantized FX module can't be loaded back,
+while ModelManager's torch.load dispatches TorchScript files to torch.jit.load.
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+import torch
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ml.performance import ModelQuantizer
+from app.core.ml_config import ml_settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main quantization entry point."""
+    parser = argparse.ArgumentParser(description="Statically quantize the skin analysis model")
+    parser.add_argument("calibration_dir", help="Directory of calibration images")
+    parser.add_argument("--samples", type=int, default=100, help="Maximum calibration images")
+    parser.add_argument("--output", help="Output path (default: <model>.int8.pth)")
+    args = parser.parse_args()
+    
+    model_path = ml_settings.get_model_path()
+    output_path = args.output or str(model_path.with_suffix(".int8.pth"))
+    
+    if not model_path.exists():
+        logger.error(f"Model file not found: {model_path}")
+        sys.exit(1)
+    
+    model = torch.load(model_path, map_location="cpu", weights_only=False)
+    if not isinstance(model, torch.nn.Module):
+        logger.error("Model file contains a state dict; a full model object is required for quantization")
+        sys.exit(1)
+    
+    calibration_data = ModelQuantizer.load_calibration_data(
+        args.calibration_dir, input_size=ml_settings.INPUT_SIZE, max_samples=args.samples
+    )
+    if not calibration_data:
+        logger.error(f"No calibration images found in {args.calibration_dir}")
+        sys.exit(1)
+    
+    quantized_model = ModelQuantizer.quantize_static(model, calibration_data)
+    with torch.no_grad():
+        scripted_model = torch.jit.trace(quantized_model, calibration_data[0])
+    torch.jit.save(scripted_model, output_path)
+    logger.info(f"✓ Quantized {model_path} -> {output_path}")
+
+
+if __name__ == "__main__":
+    main()
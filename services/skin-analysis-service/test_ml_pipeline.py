@@ -205,8 +205,12 @@ def test_pipeline_with_real_image():
         print("\n⚠ No uploads directory found, skipping real image test")
         return
     
-    image_files = list(uploads_dir.glob("*.png")) + list(uploads_dir.glob("*.jpg"))
-    image_files = [f for f in image_files if not f.name.startswith("highlighted_")]
+    # Single directory pass instead of one glob per extension plus a filter
+    image_suffixes = {".png", ".jpg"}
+    image_files = [
+        f for f in uploads_dir.iterdir()
+        if f.suffix in image_suffixes and not f.name.startswith("highlighted_")
+    ]
     
     if not image_files:
         print("\n⚠ No test images found in uploads directory")
@@ -0,0 +1,150 @@
+"""
+Unit tests for the inference performance helpers.
+
+Tests the LRU prediction cache shared by concurrent prediction threads and
+the dynamic batcher that groups concurrent requests into one forward pass.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import torch
+
+from app.ml.performance import DynamicBatcher, PredictionCache
+
+
+class TestPredictionCache:
+    """Tests for PredictionCache."""
+
+    @pytest.fixture
+    def images(self):
+        return [torch.full((1, 3, 8, 8), float(i)) for i in range(4)]
+
+    def test_hit_returns_copy(self, images):
+        """Test a cached prediction is returned as a copy of what was stored."""
+        cache = PredictionCache(maxsize=4)
+        prediction = {"skin_type": "oily"}
+        cache.put(images[0], prediction)
+
+        cached = cache.get(images[0])
+        cached["skin_type"] = "dry"
+
+        assert cache.get(images[0]) == prediction
+        assert cache.get(images[1]) is None
+
+    def test_precomputed_key(self, images):
+        """Test lookups by compute_key() match lookups by tensor."""
+        cache = PredictionCache(maxsize=4)
+        key = cache.compute_key(images[0])
+        cache.put(None, {"skin_type": "normal"}, key=key)
+
+        assert cache.get(images[0]) == {"skin_type": "normal"}
+        assert cache.get(key=key) == {"skin_type": "normal"}
+
+    def test_evicts_least_recently_used(self, images):
+        """Test a hit refreshes an entry so the oldest unused one is evicted."""
+        cache = PredictionCache(maxsize=2)
+        cache.put(images[0], {"id": 0})
+        cache.put(images[1], {"id": 1})
+        cache.get(images[0])
+        cache.put(images[2], {"id": 2})
+
+        assert cache.get(images[0]) == {"id": 0}
+        assert cache.get(images[1]) is None
+        assert cache.get(images[2]) == {"id": 2}
+        assert cache.get_stats()["size"] == 2
+
+    def test_update_existing_key_does_not_grow(self, images):
+        """Test re-inserting a key replaces the entry instead of adding one."""
+        cache = PredictionCache(maxsize=2)
+        cache.put(images[0], {"id": 0})
+        cache.put(images[0], {"id": 1})
+
+        assert cache.get(images[0]) == {"id": 1}
+        assert cache.get_stats()["size"] == 1
+
+    def test_concurrent_access(self):
+        """Test concurrent puts and gets keep the cache within maxsize."""
+        cache = PredictionCache(maxsize=16)
+        keys = [f"key-{i}" for i in range(64)]
+        errors = []
+
+        def worker(offset):
+            try:
+                for i in range(500):
+                    key = keys[(offset + i) % len(keys)]
+                    cache.put(None, {"key": key}, key=key)
+                    cached = cache.get(key=keys[(offset * 7 + i) % len(keys)])
+                    assert cached is None or set(cached) == {"key"}
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert cache.get_stats()["size"] == 16
+
+
+class TestDynamicBatcher:
+    """Tests for DynamicBatcher."""
+
+    def test_groups_concurrent_requests(self):
+        """Test concurrent submits share a batch and get their own results."""
+        batch_sizes = []
+
+        def run_batch(tensors):
+            batch_sizes.append(len(tensors))
+            return [float(tensor.sum()) for tensor in tensors]
+
+        batcher = DynamicBatcher(run_batch, max_batch_size=4, max_wait_ms=200)
+        tensors = [torch.full((1, 3, 2, 2), float(i)) for i in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(batcher.submit, tensors))
+
+        assert results == [12.0 * i for i in range(4)]
+        assert sum(batch_sizes) == 4
+        assert max(batch_sizes) > 1
+
+    def test_respects_max_batch_size(self):
+        """Test no batch exceeds max_batch_size."""
+        batch_sizes = []
+
+        def run_batch(tensors):
+            batch_sizes.append(len(tensors))
+            return [None] * len(tensors)
+
+        batcher = DynamicBatcher(run_batch, max_batch_size=2, max_wait_ms=50)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(batcher.submit, [torch.zeros(1, 3, 2, 2)] * 6))
+
+        assert sum(batch_sizes) == 6
+        assert max(batch_sizes) <= 2
+
+    def test_single_request_waits_at_most_max_wait(self):
+        """Test a lone request runs once max_wait_ms passes."""
+        batcher = DynamicBatcher(lambda tensors: ["done"] * len(tensors), max_batch_size=8, max_wait_ms=1)
+
+        assert batcher.submit(torch.zeros(1, 3, 2, 2)) == "done"
+
+    def test_forwards_exceptions_to_callers(self):
+        """Test a failed batch raises in every caller and the worker keeps running."""
+        calls = []
+
+        def run_batch(tensors):
+            calls.append(len(tensors))
+            if len(calls) == 1:
+                raise RuntimeError("forward pass failed")
+            return ["ok"] * len(tensors)
+
+        batcher = DynamicBatcher(run_batch, max_batch_size=8, max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="forward pass failed"):
+            batcher.submit(torch.zeros(1, 3, 2, 2))
+        assert batcher.submit(torch.zeros(1, 3, 2, 2)) == "ok"
@@ -158,7 +158,52 @@ class TestModelManager:
                 model_manager_auto.detect_device()
             
             assert "Failed to detect device" in str(exc_info.value)
-    
+
+    def test_select_cuda_device_honours_local_rank(self, model_manager_auto):
+        """Test LOCAL_RANK pins the CUDA device without querying memory."""
+        with patch('torch.cuda.device_count', return_value=4), \
+             patch('torch.cuda.set_device') as mock_set_device, \
+             patch('torch.cuda.mem_get_info') as mock_mem_get_info, \
+             patch.dict(os.environ, {"LOCAL_RANK": "2"}):
+            assert model_manager_auto._select_cuda_device() == 2
+
+        mock_set_device.assert_called_once_with(2)
+        mock_mem_get_info.assert_not_called()
+
+    def test_select_cuda_device_uses_nvml_free_memory(self, model_manager_auto):
+        """Test the GPU with the most free memory is picked from NVML readings."""
+        free_by_uuid = {"GPU-a": 1, "GPU-b": 8, "GPU-c": 4}
+        pynvml = MagicMock()
+        pynvml.nvmlDeviceGetHandleByUUID.side_effect = lambda uuid: uuid
+        pynvml.nvmlDeviceGetMemoryInfo.side_effect = lambda handle: Mock(free=free_by_uuid[handle])
+
+        with patch('torch.cuda.device_count', return_value=3), \
+             patch('torch.cuda.get_device_properties',
+                   side_effect=lambda i: Mock(uuid="abc"[i])), \
+             patch('torch.cuda.set_device') as mock_set_device, \
+             patch('torch.cuda.mem_get_info') as mock_mem_get_info, \
+             patch.dict('sys.modules', {"pynvml": pynvml}), \
+             patch.dict(os.environ, clear=False) as env:
+            env.pop("LOCAL_RANK", None)
+            assert model_manager_auto._select_cuda_device() == 1
+
+        mock_set_device.assert_called_once_with(1)
+        mock_mem_get_info.assert_not_called()
+        pynvml.nvmlShutdown.assert_called_once()
+
+    def test_select_cuda_device_without_nvml_uses_device_zero(self, model_manager_auto):
+        """Test missing NVML falls back to device 0 without touching other GPUs."""
+        with patch('torch.cuda.device_count', return_value=2), \
+             patch('torch.cuda.set_device') as mock_set_device, \
+             patch('torch.cuda.mem_get_info') as mock_mem_get_info, \
+             patch.dict('sys.modules', {"pynvml": None}), \
+             patch.dict(os.environ, clear=False) as env:
+            env.pop("LOCAL_RANK", None)
+            assert model_manager_auto._select_cuda_device() == 0
+
+        mock_set_device.assert_not_called()
+        mock_mem_get_info.assert_not_called()
+
     # Test model loading
     def test_load_model_success_cpu(self, model_manager_cpu):
         """Test successful model loading on CPU."""
@@ -637,3 +682,47 @@ class TestModelManager:
         for result in results:
             assert "skin_type" in result
             assert "issues" in result
+
+    def test_concurrent_lazy_loading_loads_once(self, model_manager_cpu):
+        """Test concurrent first predictions from worker threads load the model once."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        load_model = model_manager_cpu._load_model
+        with patch.object(model_manager_cpu, '_load_model', side_effect=load_model) as mock_load:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(
+                    lambda _: model_manager_cpu.predict(torch.randn(1, 3, 224, 224), use_cache=False),
+                    range(8)
+                ))
+
+        assert mock_load.call_count == 1
+        assert all("skin_type" in result for result in results)
+
+    def test_predict_batch_reraises_gpu_oom(self, model_manager_cpu):
+        """Test predict_batch lets a CUDA OOM through instead of wrapping it."""
+        model_manager_cpu.load_model()
+
+        with patch.object(model_manager_cpu, '_process_batch_outputs',
+                          side_effect=torch.cuda.OutOfMemoryError()):
+            with pytest.raises(torch.cuda.OutOfMemoryError):
+                model_manager_cpu.predict_batch([torch.randn(1, 3, 224, 224)])
+
+    def test_dynamic_batcher_gpu_oom_falls_back_to_cpu(self, temp_model_path, sample_input_tensor):
+        """Test a CUDA OOM inside a dynamic batch still triggers the CPU fallback."""
+        manager = ModelManager(
+            model_path=temp_model_path,
+            device="cpu",
+            enable_caching=False,
+            dynamic_batch_size=4,
+            max_batch_wait_ms=1
+        )
+        manager.load_model()
+        # Pretend the loaded model lives on the GPU
+        manager.device = "cuda"
+
+        with patch.object(manager._batcher, '_run_batch', side_effect=torch.cuda.OutOfMemoryError()):
+            result = manager.predict(sample_input_tensor, use_cache=False)
+
+        assert result["device_used"] == "cpu"
+        assert manager.get_device() == "cpu"
+        assert "skin_type" in result
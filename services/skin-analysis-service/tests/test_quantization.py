@@ -0,0 +1,85 @@
+"""
+Unit tests for static INT8 quantization.
+
+Tests loading calibration images and FX-mode static quantization of a
+small convolutional model.
+"""
+
+import pytest
+import torch
+import torch.nn as nn
+from PIL import Image
+
+from app.ml.performance import ModelQuantizer
+
+
+class SmallConvModel(nn.Module):
+    """Small conv/bn/relu model standing in for the skin classifier."""
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 8, 3, padding=1)
+        self.bn = nn.BatchNorm2d(8)
+        self.relu = nn.ReLU()
+        self.pool = nn.AdaptiveAvgPool2d((1, 1))
+        self.fc = nn.Linear(8, 5)
+
+    def forward(self, x):
+        x = self.pool(self.relu(self.bn(self.conv(x))))
+        return self.fc(torch.flatten(x, 1))
+
+
+class TestCalibrationData:
+    """Tests for ModelQuantizer.load_calibration_data."""
+
+    @pytest.fixture
+    def calibration_dir(self, tmp_path):
+        for i in range(3):
+            Image.new("RGB", (120, 100), color=(40 * i, 80, 120)).save(tmp_path / f"face_{i}.jpg")
+        Image.new("L", (120, 100), color=128).save(tmp_path / "gray.png")
+        (tmp_path / "notes.txt").write_text("not an image")
+        (tmp_path / "broken.jpg").write_bytes(b"not a jpeg")
+        return tmp_path
+
+    def test_loads_preprocessed_images(self, calibration_dir):
+        """Test images are preprocessed to model input tensors, others skipped."""
+        data = ModelQuantizer.load_calibration_data(str(calibration_dir), input_size=(64, 64))
+
+        # 3 JPEGs and the grayscale PNG; the text file and broken JPEG are skipped
+        assert len(data) == 4
+        assert all(tensor.shape == (1, 3, 64, 64) for tensor in data)
+
+    def test_honours_max_samples(self, calibration_dir):
+        """Test no more than max_samples images are loaded."""
+        data = ModelQuantizer.load_calibration_data(
+            str(calibration_dir), input_size=(64, 64), max_samples=2
+        )
+
+        assert len(data) == 2
+
+
+class TestStaticQuantization:
+    """Tests for ModelQuantizer.quantize_static."""
+
+    def test_quantizes_convolutions(self):
+        """Test calibrated static quantization runs the conv layers in INT8."""
+        if "fbgemm" not in torch.backends.quantized.supported_engines:
+            pytest.skip("fbgemm quantized engine not available")
+
+        torch.manual_seed(0)
+        model = SmallConvModel().eval()
+        calibration_data = [torch.randn(1, 3, 32, 32) for _ in range(8)]
+        inputs = torch.randn(2, 3, 32, 32)
+        with torch.no_grad():
+            expected = model(inputs)
+
+        quantized = ModelQuantizer.quantize_static(model, calibration_data)
+
+        assert any(
+            "quantized" in type(module).__module__ and "Conv" in type(module).__name__
+            for module in quantized.modules()
+        )
+        with torch.no_grad():
+            result = quantized(inputs)
+        assert result.shape == expected.shape
+        assert torch.allclose(result, expected, atol=0.1)
@@ -121,10 +121,11 @@ def validate_python_syntax():
     success = True
     python_files = []
     
-    # Find all Python files
+    # Find all Python files. Virtualenvs, caches and hidden directories are
+    # pruned up front so the walk never descends into third-party packages.
+    skip_dirs = {"__pycache__", "venv", "env", "node_modules", "models", "uploads"}
     for root, dirs, files in os.walk("."):
-        # Skip __pycache__ directories
-        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        dirs[:] = [d for d in dirs if d not in skip_dirs and not d.startswith(".")]
         
         for file in files:
             if file.endswith(".py"):
@@ -3,6 +3,13 @@ const protoLoader = require('@grpc/proto-loader');
 const path = require('path');
 const logger = require('../../configs/logger');
 
+// Video uploads can be up to 50MB, well above the 4MB gRPC default
+const MAX_MESSAGE_BYTES = parseInt(process.env.GRPC_MAX_MESSAGE_BYTES || `${64 * 1024 * 1024}`, 10);
+
+// Media payloads (JPEG/MP4) are already compressed, so wire compression is opt-in
+const COMPRESSION_ALGORITHMS = { identity: 0, deflate: 1, gzip: 2 };
+const COMPRESSION = COMPRESSION_ALGORITHMS[(process.env.GRPC_COMPRESSION || 'identity').toLowerCase()] || 0;
+
 class GRPCClient {
   constructor() {
     this.clients = {};
@@ -60,7 +67,10 @@ class GRPCClient {
           'grpc.keepalive_permit_without_calls': true,
           'grpc.http2.max_pings_without_data': 0,
           'grpc.http2.min_time_between_pings_ms': 10000,
-          'grpc.http2.min_ping_interval_without_data_ms': 300000
+          'grpc.http2.min_ping_interval_without_data_ms': 300000,
+          'grpc.max_send_message_length': MAX_MESSAGE_BYTES,
+          'grpc.max_receive_message_length': MAX_MESSAGE_BYTES,
+          'grpc.default_compression_algorithm': COMPRESSION
         }
       );
 